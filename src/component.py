@@ -1,10 +1,14 @@
 import argparse
+import glob
 import json
 import logging
 import os
+import re
 
 import keboola.utils as kutils
 from keboola.component import ComponentBase, UserException
+from keboola.component.base import sync_action
+from keboola.component.sync_actions import MessageType, ValidationResult
 from nested_lookup import nested_lookup
 from selenium.common.exceptions import WebDriverException
 
@@ -13,8 +17,16 @@ from webcrawler.selenium_crawler import (
     ConditionalAction,
     CrawlerActionBuilder,
     ExitAction,
+    FollowPagination,
     GenericCrawler,
 )
+from webcrawler.async_crawler import AsyncCrawlerActionBuilder
+from webcrawler.driver_backends import DriverBackendBuilder
+from webcrawler.latency import AdaptiveTimeouts, LatencyHistory
+from webcrawler.network_archive import NetworkArchive
+from webcrawler.network_recorder import NetworkRecorder
+from webcrawler.profiling import CrawlerProfiler
+from webcrawler.validation import ConfigValidator
 
 # configuration variables
 KEY_RESOLUTION = "resolution"
@@ -24,12 +36,42 @@ KEY_PAGELOAD_TIMEOUT = "page_load_timeout"
 KEY_START_URL = "start_url"
 KEY_STORE_COOKIES = "store_cookies"
 KEY_DOCKER_MODE = "docker_mode"
+KEY_MAX_TABS = "max_tabs"
+
+KEY_PROFILING = "profiling"
+KEY_PROFILING_ENABLED = "enabled"
+KEY_PROFILING_MODE = "mode"
+KEY_PROFILING_ACTIONS = "actions"
+KEY_PROFILING_TRACE_CATEGORIES = "trace_categories"
+
+KEY_DRIVER_BACKEND = "driver_backend"
+KEY_DRIVER_BACKEND_TYPE = "type"
+KEY_DRIVER_BACKEND_REMOTE_URL = "remote_url"
+
+KEY_NETWORK_ARCHIVE = "network_archive"
+KEY_NETWORK_ARCHIVE_MODE = "mode"
+KEY_NETWORK_ARCHIVE_FILE_NAME = "file_name"
+KEY_NETWORK_ARCHIVE_ALLOW_LIVE = "allow_live_requests"
+DEFAULT_NETWORK_ARCHIVE_FILE_NAME = "network_archive.zip"
+
+KEY_NETWORK_LOG = "network_log"
+KEY_NETWORK_LOG_ENABLED = "enabled"
+KEY_NETWORK_LOG_FILE_NAME = "file_name"
+KEY_NETWORK_LOG_SLOWEST_COUNT = "slowest_requests"
+
+KEY_ADAPTIVE_TIMEOUTS = "adaptive_timeouts"
+KEY_ADAPTIVE_TIMEOUTS_ENABLED = "enabled"
+KEY_ADAPTIVE_TIMEOUTS_MARGIN = "margin"
+KEY_ADAPTIVE_TIMEOUTS_MIN_TIMEOUT = "min_timeout"
+KEY_ADAPTIVE_TIMEOUTS_MIN_SAMPLES = "min_samples"
+KEY_ADAPTIVE_TIMEOUTS_HISTORY_SIZE = "history_size"
 
 KEY_STEPS = "steps"
 KEY_DESCRIPTION = "description"
 KEY_ACTIONS = "actions"
 KEY_ACTION_PARAMETERS = "action_parameters"
 KEY_ACTION_NAME = "action_name"
+KEY_RUN_IN_TAB = "run_in_tab"
 
 MANDATORY_PARAMS = [KEY_STEPS, KEY_START_URL]
 
@@ -46,9 +88,32 @@ class Component(ComponentBase):
             logging.error(e)
             exit(1)
 
+        self.user_functions = Component.UserFunctions(self)
+        self.profiler = None
+        self.network_recorder = None
+        self.network_archive = None
+        self._network_archive_file = None
+        self.adaptive_timeouts = None
+        self.driver_backend = None
+        self.web_crawler = None
+
+    def _init_crawler(self):
         logging.info("Setting up crawler..")
         # intialize instance parameters
         kbc_runid = os.environ.get("KBC_RUNID")
+        self.profiler = self._build_profiler(kbc_runid)
+        self.network_recorder = self._build_network_recorder(kbc_runid)
+        self.network_archive, self._network_archive_file = self._build_network_archive()
+        self.adaptive_timeouts = self._build_adaptive_timeouts()
+        random_wait_range = self.configuration.parameters.get(KEY_RANDOM_WAIT)
+        if self.network_archive and not self.network_archive.is_recording and random_wait_range:
+            logging.info("Random wait is disabled in the replay mode.")
+            random_wait_range = None
+        driver_backend_cfg = self.configuration.parameters.get(KEY_DRIVER_BACKEND) or {}
+        self.driver_backend = DriverBackendBuilder.build(
+            driver_backend_cfg.get(KEY_DRIVER_BACKEND_TYPE),
+            remote_url=driver_backend_cfg.get(KEY_DRIVER_BACKEND_REMOTE_URL),
+        )
         self.web_crawler = GenericCrawler(
             self.configuration.parameters[KEY_START_URL],
             resolution=self.configuration.parameters.get(KEY_RESOLUTION) or DEFAULT_RESOLUTION,
@@ -56,72 +121,246 @@ class Component(ComponentBase):
             component_interface=self,
             runid=kbc_runid,
             docker_mode=self.configuration.parameters.get(KEY_DOCKER_MODE) or True,
-            random_wait_range=self.configuration.parameters.get(KEY_RANDOM_WAIT),
+            random_wait_range=random_wait_range,
             page_load_timeout=self.configuration.parameters.get(KEY_PAGELOAD_TIMEOUT) or 1000,
+            max_tabs=self.configuration.parameters.get(KEY_MAX_TABS) or 4,
+            profiler=self.profiler,
+            network_recorder=self.network_recorder,
+            driver_backend=self.driver_backend,
+            network_archive=self.network_archive,
+            adaptive_timeouts=self.adaptive_timeouts,
         )
 
-        self.user_functions = Component.UserFunctions(self)
-
     def run(self, debug=False):
         """
         Main execution code
         """
+        errors = self._validate_configuration()
+        if errors:
+            raise UserException("Invalid configuration:\n" + "\n".join(errors))
+
         crawler_steps = self.configuration.parameters[KEY_STEPS]
 
         crawler_steps = self._fill_in_user_parameters(crawler_steps, self.configuration.parameters.get(KEY_USER_PARAMS))
 
-        logging.info("Entering first step URL %s", self.web_crawler.start_url)
-        self.web_crawler.start()
         try:
+            self._init_crawler()
+
+            if self.profiler:
+                self.profiler.start_component_profile()
+
+            logging.info("Entering first step URL %s", self.web_crawler.start_url)
+            self.web_crawler.start()
+
             # set cookies, needs to be done after the domain load
             if self.configuration.parameters.get(KEY_STORE_COOKIES):
                 logging.info("Loading cookies from last run.")
                 last_state = self.get_state_file()
                 self.web_crawler.load_cookies(last_state.get("cookies"))
 
-            for st in crawler_steps:
-                logging.info(st.get(KEY_DESCRIPTION, ""))
-                break_call = self._perform_crawler_actions(st.get(KEY_ACTIONS))
+            for in_tabs, steps in self._group_steps(crawler_steps):
+                if in_tabs:
+                    break_call = self._perform_steps_in_tabs(steps)
+                else:
+                    st = steps[0]
+                    logging.info(st.get(KEY_DESCRIPTION, ""))
+                    with self.web_crawler.profile_step(st.get(KEY_DESCRIPTION, "")):
+                        break_call = self._perform_crawler_actions(st.get(KEY_ACTIONS))
                 if break_call:
                     break
 
+            state = {}
             if self.configuration.parameters.get(KEY_STORE_COOKIES):
                 logging.info("Storing cookies for next run.")
-                cookies = self.web_crawler.get_cookies()
-                state = {"cookies": cookies}
+                state["cookies"] = self.web_crawler.get_cookies()
+            if self.adaptive_timeouts:
+                state[LatencyHistory.STATE_KEY] = self.adaptive_timeouts.history.to_state()
+            if state:
                 self.write_state_file(state)
-        except Exception:
-            raise
         finally:
-            self.web_crawler.stop()
+            self._release_resources()
 
         logging.info("Extraction finished")
 
+    def _release_resources(self):
+        """
+        Releases whatever was set up, the setup itself may have failed midway.
+        """
+        try:
+            if self.web_crawler:
+                self.web_crawler.stop()
+        finally:
+            if self.network_recorder:
+                self.network_recorder.close()
+            if self.network_archive:
+                self.network_archive.close()
+                if self._network_archive_file:
+                    self.write_manifest(self._network_archive_file)
+            if self.profiler:
+                self.profiler.stop_component_profile()
+
+    @sync_action("validate_config")
+    def validate_config(self):
+        """
+        Validates the configuration without launching the browser.
+        """
+        errors = self._validate_configuration()
+        if errors:
+            return ValidationResult("\n".join(f"- {e}" for e in errors), MessageType.DANGER)
+        return ValidationResult("The configuration is valid.", MessageType.SUCCESS)
+
+    def _validate_configuration(self):
+        validator = ConfigValidator(
+            supported_functions=Component.UserFunctions.get_supported_functions(),
+            tab_actions=list(AsyncCrawlerActionBuilder.get_supported_actions()),
+            tab_methods=AsyncCrawlerActionBuilder.get_supported_methods(),
+        )
+        return validator.validate_parameters(self.configuration.parameters)
+
+    @staticmethod
+    def _group_steps(crawler_steps):
+        """
+        Groups consecutive steps flagged with `run_in_tab`, these are executed concurrently.
+
+        :return: list of (in_tabs, steps) tuples
+        """
+        groups = []
+        for st in crawler_steps:
+            in_tabs = bool(st.get(KEY_RUN_IN_TAB))
+            if in_tabs and groups and groups[-1][0]:
+                groups[-1][1].append(st)
+            else:
+                groups.append((in_tabs, [st]))
+        return groups
+
+    def _perform_steps_in_tabs(self, steps):
+        descriptions = [st.get(KEY_DESCRIPTION, "") for st in steps]
+        logging.info("Running %i steps in parallel tabs: %s", len(steps), descriptions)
+        branches = [
+            (st.get(KEY_DESCRIPTION, ""), [self._build_action(a) for a in st.get(KEY_ACTIONS)]) for st in steps
+        ]
+        with self.web_crawler.profile_step(" | ".join(descriptions)):
+            try:
+                results = self.web_crawler.perform_in_tabs(branches)
+            except (WebDriverException, ValueError) as e:
+                raise UserException(f"Parallel steps {descriptions} failed with error: {e}") from e
+        return any(isinstance(res, ExitAction) for res in results)
+
+    @staticmethod
+    def _build_action(action_cfg):
+        return CrawlerActionBuilder.build_from_definition(action_cfg)
+
     def _perform_crawler_actions(self, actions):
         break_call = False
         for a in actions:
-            # KBC bug, empty object as array
-            action_params = a.get(KEY_ACTION_PARAMETERS, {})
-            if isinstance(action_params, list) and len(action_params) == 0:
-                action_params = {}
-
             logging.info(a.get(KEY_DESCRIPTION, ""))
-            action = CrawlerActionBuilder.build(a[KEY_ACTION_NAME], **action_params)
+            action = self._build_action(a)
             try:
-                res = self.web_crawler.perform_action(action)
+                res = self.web_crawler.perform_action(action, a.get(KEY_DESCRIPTION))
 
                 if isinstance(res, BreakBlockExecution):
                     break
 
                 is_exit_action = isinstance(action, ExitAction)
-                is_cond_exit_action = isinstance(action, ConditionalAction) and isinstance(res, ExitAction)
-                if is_exit_action or is_cond_exit_action:
+                is_nested_exit_action = isinstance(action, (ConditionalAction, FollowPagination)) and isinstance(
+                    res, ExitAction
+                )
+                if is_exit_action or is_nested_exit_action:
                     break_call = True
                     break
             except WebDriverException as e:
                 raise UserException(f"Action '{a[KEY_ACTION_NAME]}' failed with error: {e.msg}") from e
         return break_call
 
+    def _build_profiler(self, runid):
+        profiling_cfg = self.configuration.parameters.get(KEY_PROFILING) or {}
+        if not profiling_cfg.get(KEY_PROFILING_ENABLED):
+            return None
+
+        logging.info("Profiling enabled, results will be stored in out/files.")
+        return CrawlerProfiler(
+            component_interface=self,
+            runid=runid,
+            mode=profiling_cfg.get(KEY_PROFILING_MODE) or CrawlerProfiler.MODE_TRACING,
+            actions=profiling_cfg.get(KEY_PROFILING_ACTIONS),
+            trace_categories=profiling_cfg.get(KEY_PROFILING_TRACE_CATEGORIES),
+        )
+
+    def _build_network_recorder(self, runid):
+        network_log_cfg = self.configuration.parameters.get(KEY_NETWORK_LOG) or {}
+        if not network_log_cfg.get(KEY_NETWORK_LOG_ENABLED):
+            return None
+
+        logging.info("Network logging enabled, the HAR file will be stored in out/files.")
+        return NetworkRecorder(
+            component_interface=self,
+            runid=runid,
+            file_name=network_log_cfg.get(KEY_NETWORK_LOG_FILE_NAME),
+            slowest_count=network_log_cfg.get(KEY_NETWORK_LOG_SLOWEST_COUNT) or 10,
+        )
+
+    def _build_network_archive(self):
+        """
+        In the record mode the archive is created in out/files, in the replay mode it is expected in in/files.
+
+        :return: Tuple of the archive and the output file definition (record mode only).
+        """
+        archive_cfg = self.configuration.parameters.get(KEY_NETWORK_ARCHIVE) or {}
+        if not archive_cfg.get(KEY_NETWORK_ARCHIVE_MODE):
+            return None, None
+
+        mode = archive_cfg[KEY_NETWORK_ARCHIVE_MODE]
+        file_name = archive_cfg.get(KEY_NETWORK_ARCHIVE_FILE_NAME) or DEFAULT_NETWORK_ARCHIVE_FILE_NAME
+        if mode == NetworkArchive.MODE_RECORD:
+            out_file = self.create_out_file_definition(file_name, tags=["network_archive"])
+            return NetworkArchive(out_file.full_path, mode), out_file
+
+        in_file = self._get_latest_input_file(file_name)
+        if not in_file:
+            raise UserException(f"The network archive '{file_name}' was not found in the input files.")
+        logging.info("Replaying network responses from %s", in_file)
+        return NetworkArchive(in_file, mode, archive_cfg.get(KEY_NETWORK_ARCHIVE_ALLOW_LIVE, False)), None
+
+    def _get_latest_input_file(self, file_name: str) -> str | None:
+        """
+        Returns the path of the input file with the highest file id, the input files are named `{file_id}_{name}`.
+        """
+        name_re = re.compile(rf"(\d+)_{re.escape(file_name)}")
+        in_files = {}
+        for path in glob.glob(os.path.join(self.files_in_path, f"*{file_name}")):
+            match = name_re.fullmatch(os.path.basename(path))
+            if match:
+                in_files[int(match.group(1))] = path
+        if not in_files:
+            return None
+        in_files = [in_files[file_id] for file_id in sorted(in_files)]
+        if len(in_files) > 1:
+            logging.warning(
+                "Found %i input files named '%s', using the latest one: %s", len(in_files), file_name, in_files[-1]
+            )
+        return in_files[-1]
+
+    def _build_adaptive_timeouts(self):
+        adaptive_cfg = self.configuration.parameters.get(KEY_ADAPTIVE_TIMEOUTS) or {}
+        if not adaptive_cfg.get(KEY_ADAPTIVE_TIMEOUTS_ENABLED):
+            return None
+
+        # the network is not used in the replay mode, its latencies would distort the history
+        if self.network_archive and not self.network_archive.is_recording:
+            logging.info("Adaptive timeouts are disabled in the replay mode.")
+            return None
+
+        history = LatencyHistory(
+            self.get_state_file().get(LatencyHistory.STATE_KEY),
+            history_size=adaptive_cfg.get(KEY_ADAPTIVE_TIMEOUTS_HISTORY_SIZE) or 50,
+        )
+        return AdaptiveTimeouts(
+            history,
+            margin=adaptive_cfg.get(KEY_ADAPTIVE_TIMEOUTS_MARGIN) or 3.0,
+            min_timeout=adaptive_cfg.get(KEY_ADAPTIVE_TIMEOUTS_MIN_TIMEOUT) or 5,
+            min_samples=adaptive_cfg.get(KEY_ADAPTIVE_TIMEOUTS_MIN_SAMPLES) or 5,
+        )
+
     def _fill_in_user_parameters(self, crawler_steps, user_param):
         # convert to string minified
         steps_string = json.dumps(crawler_steps, separators=(",", ":"))
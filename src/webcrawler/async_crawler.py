@@ -0,0 +1,470 @@
+import abc
+import asyncio
+import base64
+import json
+import logging
+import os
+import random
+import shutil
+import time
+from typing import Dict, List, Tuple
+
+from selenium.common.exceptions import NoSuchElementException, TimeoutException, WebDriverException
+from selenium.webdriver.remote.webdriver import WebDriver
+
+from webcrawler.cdp import CdpConnection, CdpError
+from webcrawler.network_archive import NetworkArchive
+from webcrawler.network_recorder import NetworkRecorder
+from webcrawler.selenium_crawler import (
+    BreakBlockExecution,
+    ClickElementToDownload,
+    ConditionalAction,
+    CrawlerAction,
+    DownloadPageContent,
+    ExitAction,
+    GenericDriverAction,
+    GenericElementAction,
+    MoveToElement,
+    PrintHtmlPage,
+    TakeScreenshot,
+    Wait,
+    WaitForElement,
+)
+
+# returns the first element matching the XPATH, the expression is inserted as JS string literal
+JS_FIND_ELEMENT = (
+    "document.evaluate(%s, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue"
+)
+
+
+class CdpTab:
+    """
+    Browser tab driven over the DevTools protocol. All tabs share the browser context of the Selenium session,
+    i.e. the cookies and login state.
+    """
+
+    def __init__(self, connection: CdpConnection, target_id: str, session_id: str, page_load_timeout=300):
+        self.connection = connection
+        self.target_id = target_id
+        self.session_id = session_id
+        self.page_load_timeout = page_load_timeout
+
+    @classmethod
+    async def open(cls, connection: CdpConnection, url: str, download_folder: str, page_load_timeout=300):
+        target = await connection.send("Target.createTarget", {"url": "about:blank"})
+        session = await connection.send("Target.attachToTarget", {"targetId": target["targetId"], "flatten": True})
+        tab = cls(connection, target["targetId"], session["sessionId"], page_load_timeout)
+        await tab.send("Page.enable")
+        # route the downloads of each tab into a separate folder
+        await tab.send("Page.setDownloadBehavior", {"behavior": "allow", "downloadPath": download_folder})
+        await tab.navigate(url)
+        return tab
+
+    async def send(self, method: str, params: dict = None) -> dict:
+        return await self.connection.send(method, params, session_id=self.session_id)
+
+    async def close(self):
+        try:
+            await self.connection.send("Target.closeTarget", {"targetId": self.target_id})
+        except CdpError as e:
+            logging.warning("Failed to close tab %s: %s", self.target_id, e.msg)
+
+    async def navigate(self, url: str):
+        loaded = asyncio.get_running_loop().create_future()
+
+        def _on_load(params, session_id):
+            if session_id == self.session_id and not loaded.done():
+                loaded.set_result(params)
+
+        self.connection.on("Page.loadEventFired", _on_load)
+        try:
+            result = await self.send("Page.navigate", {"url": url})
+            if result.get("errorText"):
+                raise CdpError(f"Navigation to {url} failed: {result['errorText']}")
+            await self._wait_for(loaded, f"Page {url} load")
+        finally:
+            self.connection.remove_listener("Page.loadEventFired", _on_load)
+
+    async def reload(self):
+        await self.navigate(await self.current_url())
+
+    async def current_url(self) -> str:
+        return await self.evaluate("window.location.href")
+
+    async def page_source(self) -> str:
+        return await self.evaluate("document.documentElement.outerHTML")
+
+    async def evaluate(self, expression: str, await_promise=False):
+        result = await self.send(
+            "Runtime.evaluate", {"expression": expression, "returnByValue": True, "awaitPromise": await_promise}
+        )
+        if result.get("exceptionDetails"):
+            raise CdpError(f"Script failed: {result['exceptionDetails'].get('text')}")
+        return result["result"].get("value")
+
+    async def call_on_element(self, xpath: str, function_body: str, *args):
+        """
+        Executes the function body with the element bound to `el` and the args available as `args`.
+        """
+        expression = f"""(() => {{
+            const el = {JS_FIND_ELEMENT % self._js_literal(xpath)};
+            if (!el) {{ return {{"found": false}}; }}
+            const args = {self._js_literal(list(args))};
+            return {{"found": true, "value": (() => {{ {function_body} }})()}};
+        }})()"""
+        result = await self.evaluate(expression, await_promise=True)
+        if not result["found"]:
+            raise NoSuchElementException(f"Unable to locate element: {xpath}")
+        return result["value"]
+
+    async def is_element_visible(self, xpath: str) -> bool:
+        try:
+            return await self.call_on_element(xpath, "return el.getClientRects().length > 0;")
+        except NoSuchElementException:
+            return False
+
+    async def get_cookies(self, url: str) -> List[dict]:
+        return (await self.send("Network.getCookies", {"urls": [url]}))["cookies"]
+
+    async def _wait_for(self, future: asyncio.Future, description: str):
+        try:
+            return await asyncio.wait_for(future, self.page_load_timeout)
+        except asyncio.TimeoutError:
+            raise TimeoutException(f"{description} timed out after {self.page_load_timeout}s.")
+
+    @staticmethod
+    def _js_literal(value) -> str:
+        return json.dumps(value)
+
+
+class AsyncCrawlerAction:
+    """
+    Async counterpart of a CrawlerAction executed in a CdpTab. The counterpart class is named `Async[ActionName]`,
+    inherits the parameters from the original action and implements `execute_async`.
+    """
+
+    @abc.abstractmethod
+    async def execute_async(self, tab: CdpTab, **extra_args):
+        pass
+
+
+class AsyncWaitForElement(AsyncCrawlerAction, WaitForElement):
+    async def execute_async(self, tab: CdpTab, **extra_args):
+        deadline = time.monotonic() + self.delay
+        while not await tab.is_element_visible(self.xpath):
+            if time.monotonic() > deadline:
+                raise TimeoutException(f"Element {self.xpath} was not visible after {self.delay}s.")
+            await asyncio.sleep(0.1)
+
+
+class AsyncGenericElementAction(AsyncCrawlerAction, GenericElementAction):
+    SUPPORTED_METHODS = ["click", "send_keys", "clear", "submit", "get_attribute"]
+
+    async def execute_async(self, tab: CdpTab, **extra_args):
+        positional_args = self.method_args.pop("positional_arguments", [])
+        if isinstance(positional_args, str):
+            positional_args = [positional_args]
+
+        if self.method_name == "click":
+            return await tab.call_on_element(self.xpath, "el.click();")
+        elif self.method_name == "clear":
+            return await tab.call_on_element(self.xpath, "el.value = '';")
+        elif self.method_name == "submit":
+            return await tab.call_on_element(self.xpath, "(el.form || el).submit();")
+        elif self.method_name == "get_attribute":
+            return await tab.call_on_element(self.xpath, "return el.getAttribute(args[0]);", *positional_args)
+        elif self.method_name == "send_keys":
+            await tab.call_on_element(self.xpath, "el.focus();")
+            return await tab.send("Input.insertText", {"text": "".join(str(a) for a in positional_args)})
+        raise ValueError(
+            f"Method '{self.method_name}' is not supported in tabs, supported methods are {self.SUPPORTED_METHODS}"
+        )
+
+
+class AsyncMoveToElement(AsyncCrawlerAction, MoveToElement):
+    async def execute_async(self, tab: CdpTab, **extra_args):
+        x, y = await tab.call_on_element(
+            self.xpath,
+            "el.scrollIntoView({block: 'center'}); const r = el.getBoundingClientRect();"
+            "return [r.left + r.width / 2, r.top + r.height / 2];",
+        )
+        await tab.send("Input.dispatchMouseEvent", {"type": "mouseMoved", "x": x, "y": y})
+
+
+class AsyncClickElementToDownload(AsyncCrawlerAction, ClickElementToDownload):
+    async def execute_async(self, tab: CdpTab, **extra_args):
+        download_folder = extra_args.pop("download_folder")
+        existing_files = os.listdir(download_folder)
+        await tab.call_on_element(self.xpath, "el.click();")
+        await asyncio.sleep(self.delay)
+
+        deadline = time.monotonic() + self.timeout
+        while True:
+            # skip the incomplete downloads
+            new_files = [
+                f for f in os.listdir(download_folder) if f not in existing_files and not f.endswith(".crdownload")
+            ]
+            if new_files:
+                return new_files
+            if time.monotonic() > deadline:
+                raise TimeoutError("File download timed out! Try to raise the timeout interval.")
+            await asyncio.sleep(0.5)
+
+
+class AsyncDownloadPageContent(AsyncCrawlerAction, DownloadPageContent):
+    async def execute_async(self, tab: CdpTab, **extra_args):
+        download_folder = extra_args.pop("download_folder")
+        res_file_path = os.path.join(download_folder, self.result_file_name)
+
+        url = self.url or await tab.current_url()
+        if self.use_stream_get:
+            cookies = await tab.get_cookies(url)
+            res, content_size, elapsed = await asyncio.get_running_loop().run_in_executor(
+                None, self._download, url, cookies, res_file_path, extra_args.get("network_archive")
+            )
+            # recorded in the event loop thread, the recorder is not thread safe
+            network_recorder: NetworkRecorder = extra_args.get("network_recorder")
+            if network_recorder:
+                network_recorder.record_http_response(res, content_size, elapsed)
+        else:
+            if self.url:
+                await tab.navigate(url)
+            with open(res_file_path, "w+") as out:
+                out.write(await tab.page_source())
+
+    def _download(self, url: str, cookies: List[dict], res_file_path: str, network_archive: NetworkArchive = None):
+        s = self._create_http_session(cookies, network_archive)
+        return self._stream_to_file(s, url, res_file_path)
+
+
+class AsyncPrintHtmlPage(AsyncCrawlerAction, PrintHtmlPage):
+    async def execute_async(self, tab: CdpTab, **extra_args):
+        html = await tab.page_source()
+        if self.log_level:
+            logging.log(self.log_level, html)
+
+
+class AsyncTakeScreenshot(AsyncCrawlerAction, TakeScreenshot):
+    async def execute_async(self, tab: CdpTab, **extra_args):
+        folder_path = os.path.join(extra_args.pop("data_folder"), self.folder)
+        runid_prefix = extra_args.get("runid", "")
+        os.makedirs(folder_path, exist_ok=True)
+
+        img_path = os.path.join(folder_path, self.name + ".png")
+        screenshot = await tab.send("Page.captureScreenshot", {"format": "png"})
+        with open(img_path, "wb") as out:
+            out.write(base64.b64decode(screenshot["data"]))
+        if self.imgbb_token:
+            await asyncio.get_running_loop().run_in_executor(
+                None, self._store_in_imgbb, img_path, self.imgbb_token, str(runid_prefix) + "_" + self.name
+            )
+
+
+class AsyncWait(AsyncCrawlerAction, Wait):
+    async def execute_async(self, tab: CdpTab, **extra_args):
+        await asyncio.sleep(self.seconds)
+
+
+class AsyncGenericDriverAction(AsyncCrawlerAction, GenericDriverAction):
+    SUPPORTED_METHODS = ["get", "refresh", "back", "forward", "execute_script"]
+
+    async def execute_async(self, tab: CdpTab, **extra_args):
+        positional_args = self.method_args.pop("positional_arguments", [])
+        if isinstance(positional_args, str):
+            positional_args = [positional_args]
+        url = positional_args[0] if positional_args else self.method_args.get("url")
+
+        try:
+            if self.method_name == "get":
+                return await tab.navigate(url)
+            elif self.method_name == "refresh":
+                return await tab.reload()
+            elif self.method_name == "back":
+                return await tab.evaluate("window.history.back()")
+            elif self.method_name == "forward":
+                return await tab.evaluate("window.history.forward()")
+            elif self.method_name == "execute_script":
+                return await tab.evaluate(f"(() => {{ {positional_args[0]} }})()", await_promise=True)
+        except TimeoutException:
+            return None
+        raise ValueError(
+            f"Method '{self.method_name}' is not supported in tabs, supported methods are {self.SUPPORTED_METHODS}"
+        )
+
+
+class AsyncExitAction(AsyncCrawlerAction, ExitAction):
+    async def execute_async(self, tab: CdpTab, **extra_args):
+        return self.execute(None, **extra_args)
+
+
+class AsyncBreakBlockExecution(AsyncCrawlerAction, BreakBlockExecution):
+    async def execute_async(self, tab: CdpTab, **extra_args):
+        return self.execute(None, **extra_args)
+
+
+class AsyncConditionalAction(AsyncCrawlerAction, ConditionalAction):
+    async def execute_async(self, tab: CdpTab, **extra_args):
+        logging.info("Executing test action %s", type(self.test_action).__name__)
+        try:
+            await self.test_action.execute_async(tab, **extra_args)
+        except WebDriverException as e:
+            logging.info("The testing action %s failed with error: %s", type(self.test_action).__name__, str(e))
+            if self.fail_action:
+                logging.info("Executing action (%s) defined on failure.", type(self.fail_action).__name__)
+                return await self.fail_action.execute_async(tab, **extra_args)
+            else:
+                logging.info("Continue execution..")
+                return
+
+        if self.result_action:
+            logging.info("Test action passed, executing result_action %s", type(self.result_action).__name__)
+            return await self.result_action.execute_async(tab, **extra_args)
+        else:
+            logging.info("No result action specified, continuing..")
+
+
+class AsyncCrawlerActionBuilder:
+    @staticmethod
+    def from_action(action: CrawlerAction) -> AsyncCrawlerAction:
+        """
+        Converts action built by the CrawlerActionBuilder into its async counterpart.
+        """
+        supported_actions = AsyncCrawlerActionBuilder.get_supported_actions()
+        action_name = type(action).__name__
+        if action_name not in supported_actions:
+            raise ValueError(
+                f"{action_name} is not supported in tabs, supported values are: [{list(supported_actions.keys())}]"
+            )
+
+        async_action = supported_actions[action_name].__new__(supported_actions[action_name])
+        async_action.__dict__.update(action.__dict__)
+        if isinstance(action, ConditionalAction):
+            for attr in ["test_action", "result_action", "fail_action"]:
+                if getattr(action, attr):
+                    setattr(async_action, attr, AsyncCrawlerActionBuilder.from_action(getattr(action, attr)))
+        return async_action
+
+    @staticmethod
+    def get_supported_actions():
+        prefix = "Async"
+        return {c.__name__[len(prefix):]: c for c in AsyncCrawlerAction.__subclasses__()}
+
+    @staticmethod
+    def get_supported_methods() -> Dict[str, List[str]]:
+        """
+        Returns the method names supported in tabs by the generic actions, keyed by the action name.
+        """
+        return {
+            name: c.SUPPORTED_METHODS
+            for name, c in AsyncCrawlerActionBuilder.get_supported_actions().items()
+            if hasattr(c, "SUPPORTED_METHODS")
+        }
+
+
+class MultiTabExecutor:
+    """
+    Executes several action sequences concurrently, each in its own tab of the Selenium controlled browser.
+
+    The tabs share the cookies of the browser session. Downloads of each tab are routed into a separate folder
+    and moved to the output folder once the tab finishes.
+    """
+
+    def __init__(
+        self,
+        driver: WebDriver,
+        download_folder: str,
+        data_folder: str,
+        component_interface,
+        runid="",
+        max_tabs=4,
+        random_wait_range=None,
+        page_load_timeout=300,
+        network_archive: NetworkArchive = None,
+        network_recorder: NetworkRecorder = None,
+    ):
+        self.driver = driver
+        self.download_folder = download_folder
+        self.data_folder = data_folder
+        self.component_interface = component_interface
+        self.runid = runid
+        self.max_tabs = max_tabs
+        self.random_wait_range = random_wait_range
+        self.page_load_timeout = page_load_timeout
+        self.network_archive = network_archive
+        self.network_recorder = network_recorder
+
+    def run(self, branches: List[Tuple[str, List[CrawlerAction]]]) -> List:
+        """
+        Runs the branches concurrently.
+
+        :param branches: List of (description, actions) tuples.
+        :return: Result of the last action of each branch.
+        """
+        async_branches = [
+            (description, [AsyncCrawlerActionBuilder.from_action(a) for a in actions])
+            for description, actions in branches
+        ]
+        return asyncio.run(self._run_branches(async_branches))
+
+    async def _run_branches(self, branches: List[Tuple[str, List[AsyncCrawlerAction]]]) -> List:
+        connection = CdpConnection(CdpConnection.get_browser_websocket_url(self.driver), self.page_load_timeout)
+        await connection.connect()
+        semaphore = asyncio.Semaphore(self.max_tabs)
+        start_url = self.driver.current_url
+        try:
+            return await asyncio.gather(
+                *[
+                    self._run_branch(connection, semaphore, index, start_url, description, actions)
+                    for index, (description, actions) in enumerate(branches)
+                ]
+            )
+        finally:
+            await connection.close()
+
+    async def _run_branch(
+        self,
+        connection: CdpConnection,
+        semaphore: asyncio.Semaphore,
+        index: int,
+        start_url: str,
+        description: str,
+        actions: List[AsyncCrawlerAction],
+    ):
+        async with semaphore:
+            tab_folder = os.path.join(self.data_folder, "tabs", str(index))
+            os.makedirs(tab_folder, exist_ok=True)
+            logging.info("[tab %i] %s", index, description)
+            tab = await CdpTab.open(connection, start_url, tab_folder, self.page_load_timeout)
+            res = None
+            try:
+                for action in actions:
+                    logging.info("[tab %i] Executing %s", index, type(action).__name__)
+                    res = await action.execute_async(
+                        tab,
+                        download_folder=tab_folder,
+                        data_folder=self.data_folder,
+                        component_interface=self.component_interface,
+                        runid=self.runid,
+                        network_archive=self.network_archive,
+                        network_recorder=self.network_recorder,
+                    )
+                    if isinstance(res, (BreakBlockExecution, ExitAction)):
+                        break
+                    await self._wait_random()
+            finally:
+                await tab.close()
+                self._move_downloads(tab_folder)
+            return res
+
+    async def _wait_random(self):
+        if self.random_wait_range is None:
+            return
+        await asyncio.sleep(random.randint(self.random_wait_range[0], self.random_wait_range[1]))
+
+    def _move_downloads(self, tab_folder: str):
+        for file_name in os.listdir(tab_folder):
+            target = os.path.join(self.download_folder, file_name)
+            if os.path.exists(target):
+                logging.warning("File %s produced by multiple tabs, it will be overwritten.", file_name)
+            shutil.move(os.path.join(tab_folder, file_name), target)
+        shutil.rmtree(tab_folder, ignore_errors=True)
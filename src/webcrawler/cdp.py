@@ -0,0 +1,141 @@
+import asyncio
+import inspect
+import itertools
+import json
+import logging
+import threading
+from typing import Callable, Dict, List
+
+import requests
+import websocket
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.remote.webdriver import WebDriver
+
+
+class CdpError(WebDriverException):
+    """
+    Failure of a Chrome DevTools Protocol command.
+    """
+
+
+class CdpConnection:
+    """
+    Asyncio client of the Chrome DevTools Protocol connected to the browser websocket endpoint.
+
+    The websocket is read in a background thread, responses and events are dispatched to the event loop
+    the connection was opened in. Page level commands are sent through the flat session mode,
+    i.e. with the `sessionId` of the attached target.
+    """
+
+    def __init__(self, websocket_url: str, command_timeout=300):
+        self.websocket_url = websocket_url
+        self.command_timeout = command_timeout
+        self._ws = None
+        self._loop = None
+        self._reader = None
+        self._ids = itertools.count(1)
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._listeners: Dict[str, List[Callable]] = {}
+        self._handler_tasks = set()
+
+    @staticmethod
+    def get_browser_websocket_url(driver: WebDriver) -> str:
+        """
+        Returns the browser websocket endpoint of the session. Selenium Grid exposes it in the `se:cdp` capability,
+        local chromedriver sessions expose the DevTools address.
+        """
+        if driver.capabilities.get("se:cdp"):
+            return driver.capabilities["se:cdp"]
+        debugger_address = driver.capabilities.get("goog:chromeOptions", {}).get("debuggerAddress")
+        if not debugger_address:
+            raise CdpError("The browser session does not expose the DevTools endpoint.")
+        response = requests.get(f"http://{debugger_address}/json/version")
+        response.raise_for_status()
+        return response.json()["webSocketDebuggerUrl"]
+
+    async def connect(self):
+        self._loop = asyncio.get_running_loop()
+        self._ws = await self._loop.run_in_executor(
+            None,
+            lambda: websocket.create_connection(self.websocket_url, suppress_origin=True, enable_multithread=True),
+        )
+        self._reader = threading.Thread(target=self._read_messages, daemon=True)
+        self._reader.start()
+
+    async def close(self):
+        if self._ws:
+            self._ws.close()
+            self._ws = None
+
+    async def send(self, method: str, params: dict = None, session_id: str = None) -> dict:
+        if not self._ws:
+            raise CdpError(f"Cannot send {method}, the DevTools connection is closed.")
+        message_id = next(self._ids)
+        payload = {"id": message_id, "method": method, "params": params or {}}
+        if session_id:
+            payload["sessionId"] = session_id
+
+        future = self._loop.create_future()
+        self._pending[message_id] = future
+        self._ws.send(json.dumps(payload))
+        try:
+            return await asyncio.wait_for(future, self.command_timeout)
+        finally:
+            self._pending.pop(message_id, None)
+
+    def on(self, method: str, handler: Callable[[dict, str], None]):
+        """
+        Registers event handler called with the event params and the session id. Coroutine handlers are scheduled
+        as tasks.
+        """
+        self._listeners.setdefault(method, []).append(handler)
+
+    def remove_listener(self, method: str, handler: Callable[[dict, str], None]):
+        if handler in self._listeners.get(method, []):
+            self._listeners[method].remove(handler)
+
+    def _read_messages(self):
+        while True:
+            try:
+                raw_message = self._ws.recv()
+            except (websocket.WebSocketException, OSError, AttributeError):
+                break
+            if not raw_message:
+                continue
+            try:
+                self._loop.call_soon_threadsafe(self._dispatch, json.loads(raw_message))
+            except RuntimeError:
+                # the event loop is already closed
+                return
+        try:
+            self._loop.call_soon_threadsafe(self._fail_pending)
+        except RuntimeError:
+            pass
+
+    def _dispatch(self, message: dict):
+        if "id" in message:
+            future = self._pending.get(message["id"])
+            if not future or future.done():
+                return
+            if "error" in message:
+                future.set_exception(CdpError(f"{message['error'].get('message')} {message['error'].get('data', '')}"))
+            else:
+                future.set_result(message.get("result", {}))
+            return
+
+        for handler in list(self._listeners.get(message.get("method"), [])):
+            result = handler(message.get("params", {}), message.get("sessionId"))
+            if inspect.isawaitable(result):
+                task = self._loop.create_task(result)
+                self._handler_tasks.add(task)
+                task.add_done_callback(self._on_handler_done)
+
+    def _fail_pending(self):
+        for future in self._pending.values():
+            if not future.done():
+                future.set_exception(CdpError("The DevTools connection was closed."))
+
+    def _on_handler_done(self, task: asyncio.Task):
+        self._handler_tasks.discard(task)
+        if not task.cancelled() and task.exception():
+            logging.warning("DevTools event handler failed: %s", task.exception())
@@ -0,0 +1,89 @@
+import abc
+import logging
+import time
+
+from selenium import webdriver
+from selenium.webdriver.chromium.remote_connection import ChromiumRemoteConnection
+from selenium.webdriver.remote.command import Command
+from selenium.webdriver.remote.webdriver import WebDriver
+
+
+class RemoteChromeDriver(WebDriver):
+    """
+    Chrome session opened against a remote WebDriver endpoint.
+
+    Exposes the Chromium specific commands used by the crawler that are not part of the generic remote driver.
+    """
+
+    def __init__(self, command_executor: str, options: webdriver.ChromeOptions):
+        executor = ChromiumRemoteConnection(
+            remote_server_addr=command_executor, vendor_prefix="goog", browser_name="chrome"
+        )
+        super().__init__(command_executor=executor, options=options)
+
+    def get_log(self, log_type):
+        return self.execute(Command.GET_LOG, {"type": log_type})["value"]
+
+
+class DriverBackend:
+    """
+    Creates the browser sessions of the crawler.
+    """
+
+    def acquire_driver(self, options: webdriver.ChromeOptions) -> WebDriver:
+        start = time.perf_counter()
+        driver = self._create_driver(options)
+        logging.info("Browser session created in %.2fs", time.perf_counter() - start)
+        return driver
+
+    def release_driver(self, driver: WebDriver):
+        driver.quit()
+
+    @abc.abstractmethod
+    def _create_driver(self, options: webdriver.ChromeOptions) -> WebDriver:
+        pass
+
+
+class LocalDriverBackend(DriverBackend):
+    """
+    Starts a new chromedriver process for the session.
+    """
+
+    def _create_driver(self, options: webdriver.ChromeOptions) -> WebDriver:
+        return webdriver.Chrome(options=options)
+
+
+class RemoteDriverBackend(DriverBackend):
+    """
+    Connects to a remote WebDriver endpoint, e.g. Selenium Grid or a Selenium standalone Chrome container.
+    """
+
+    # the browser downloads the files to the remote node, they never appear in the local download folder
+    UNSUPPORTED_ACTIONS = ["ClickElementToDownload"]
+
+    def __init__(self, remote_url: str):
+        self.remote_url = remote_url
+
+    def _create_driver(self, options: webdriver.ChromeOptions) -> WebDriver:
+        return RemoteChromeDriver(self.remote_url, options)
+
+
+class DriverBackendBuilder:
+    BACKEND_LOCAL = "local"
+    BACKEND_REMOTE = "remote"
+    SUPPORTED_BACKENDS = [BACKEND_LOCAL, BACKEND_REMOTE]
+
+    @staticmethod
+    def build(backend_type: str = BACKEND_LOCAL, remote_url: str = None) -> DriverBackend:
+        backend_type = backend_type or DriverBackendBuilder.BACKEND_LOCAL
+        if backend_type == DriverBackendBuilder.BACKEND_LOCAL:
+            return LocalDriverBackend()
+        elif backend_type == DriverBackendBuilder.BACKEND_REMOTE:
+            if not remote_url:
+                raise ValueError("The 'remote_url' must be specified for the 'remote' driver backend.")
+            return RemoteDriverBackend(remote_url)
+        else:
+            raise ValueError(
+                f"Unsupported driver backend '{backend_type}', "
+                f"supported values are: {DriverBackendBuilder.SUPPORTED_BACKENDS}"
+            )
@@ -0,0 +1,106 @@
+import logging
+import math
+from typing import Dict, List
+
+
+class LatencyHistory:
+    """
+    Latencies observed per key (e.g. an action and its XPATH) over the previous runs.
+
+    Only the last `history_size` samples of each key are kept. The least recently updated keys are dropped
+    once there are more than `max_keys` of them, so the history stays bounded when the keys contain dynamic values.
+    """
+
+    STATE_KEY = "latency_history"
+
+    def __init__(self, samples: Dict[str, List[float]] = None, history_size=50, max_keys=200):
+        self.history_size = history_size
+        self.max_keys = max_keys
+        self._samples = {}
+        for key, values in (samples or {}).items():
+            if isinstance(values, list):
+                self._samples[key] = [float(v) for v in values][-history_size:]
+
+    def add(self, key: str, seconds: float):
+        # re-inserted, so the dict is ordered by the last update
+        values = self._samples.pop(key, [])
+        values.append(round(seconds, 3))
+        self._samples[key] = values[-self.history_size:]
+
+    def sample_count(self, key: str) -> int:
+        return len(self._samples.get(key, []))
+
+    def percentile(self, key: str, percentile: float) -> float | None:
+        """
+        Returns the nearest-rank percentile of the key samples, None if there are no samples.
+        """
+        values = sorted(self._samples.get(key, []))
+        if not values:
+            return None
+        rank = max(math.ceil(percentile / 100 * len(values)), 1)
+        return values[rank - 1]
+
+    def to_state(self) -> Dict[str, List[float]]:
+        keys = list(self._samples)[-self.max_keys:]
+        return {key: self._samples[key] for key in keys}
+
+
+class AdaptiveTimeouts:
+    """
+    Derives the timeouts from the latency history: the p99 of the observed latencies multiplied by the margin,
+    at least `min_timeout` and at most the configured value. The configured value is used until `min_samples`
+    latencies are observed.
+    """
+
+    def __init__(self, history: LatencyHistory, margin=3.0, min_timeout=5, min_samples=5):
+        """
+
+        :param history: Latencies observed in the previous runs, new observations are added to it.
+        :param margin: Multiplier of the observed p99 latency.
+        :param min_timeout: Lower bound of the adapted timeouts in seconds.
+        :param min_samples: Number of observations needed before the timeout is adapted.
+        """
+        self.history = history
+        self.margin = margin
+        self.min_timeout = min_timeout
+        self.min_samples = min_samples
+        self._logged_keys = set()
+
+    def timeout(self, key: str, configured: float) -> float:
+        """
+        Returns the adapted timeout of the key, never exceeding the configured value.
+        """
+        sample_count = self.history.sample_count(key)
+        if sample_count < self.min_samples:
+            self._log_once(
+                key,
+                "%s: using the configured %ss, %i of %i latency samples collected",
+                key,
+                configured,
+                sample_count,
+                self.min_samples,
+            )
+            return configured
+
+        p50 = self.history.percentile(key, 50)
+        p99 = self.history.percentile(key, 99)
+        adapted = min(configured, max(self.min_timeout, p99 * self.margin))
+        self._log_once(
+            key,
+            "%s: budget %.1fs (configured %ss, observed p50 %.2fs, p99 %.2fs over %i samples)",
+            key,
+            adapted,
+            configured,
+            p50,
+            p99,
+            sample_count,
+        )
+        return adapted
+
+    def add(self, key: str, seconds: float):
+        self.history.add(key, seconds)
+
+    def _log_once(self, key: str, msg: str, *args):
+        if key not in self._logged_keys:
+            self._logged_keys.add(key)
+            logging.info("Adaptive timeout " + msg, *args)
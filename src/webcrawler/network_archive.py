@@ -0,0 +1,296 @@
+import asyncio
+import base64
+import hashlib
+import io
+import json
+import logging
+import shutil
+import tempfile
+import threading
+import zipfile
+from datetime import timedelta
+from typing import BinaryIO, List
+
+import requests
+from requests.adapters import HTTPAdapter
+from selenium.webdriver.remote.webdriver import WebDriver
+from urllib3 import HTTPHeaderDict, HTTPResponse
+
+from webcrawler.cdp import CdpConnection, CdpError
+
+
+class NetworkArchive:
+    """
+    Zip archive of recorded network responses.
+
+    Responses are keyed by method, URL and request body. Repeated requests with the same key are replayed in the
+    recorded order, the last response is repeated once the sequence is exhausted. Bodies are stored deduplicated
+    by their content hash and streamed to the archive immediately, only the index is kept in memory.
+    """
+
+    CHUNK_SIZE = 64 * 1024
+
+    MODE_RECORD = "record"
+    MODE_REPLAY = "replay"
+    SUPPORTED_MODES = [MODE_RECORD, MODE_REPLAY]
+
+    INDEX_FILE = "index.json"
+
+    def __init__(self, file_path: str, mode: str, allow_live_requests=False):
+        """
+
+        :param file_path: Path of the archive file
+        :param mode: `record` creates a new archive, `replay` serves responses from an existing one.
+        :param allow_live_requests: In the replay mode, requests missing in the archive are sent to the network
+        instead of failing.
+        """
+        if mode not in self.SUPPORTED_MODES:
+            raise ValueError(f"Unsupported archive mode '{mode}', supported values are: {self.SUPPORTED_MODES}")
+        self.file_path = file_path
+        self.mode = mode
+        self.allow_live_requests = allow_live_requests
+        self.missed_requests = 0
+
+        self._lock = threading.Lock()
+        self._index = {}
+        self._replay_positions = {}
+        if mode == self.MODE_RECORD:
+            self._zip = zipfile.ZipFile(file_path, "w", compression=zipfile.ZIP_DEFLATED)
+        else:
+            self._zip = zipfile.ZipFile(file_path, "r")
+            self._index = json.loads(self._zip.read(self.INDEX_FILE))
+        self._stored_bodies = set(self._zip.namelist())
+
+    @property
+    def is_recording(self) -> bool:
+        return self.mode == self.MODE_RECORD
+
+    @staticmethod
+    def request_key(method: str, url: str, post_data: bytes | str | None = None) -> str:
+        if isinstance(post_data, str):
+            post_data = post_data.encode("utf-8")
+        post_hash = hashlib.sha1(post_data).hexdigest() if post_data else ""
+        return f"{method.upper()} {url} {post_hash}".strip()
+
+    def add(self, key: str, status: int, headers: List[dict], body: bytes | BinaryIO):
+        """
+
+        :param key: Request key, see `request_key`
+        :param status: Response status code
+        :param headers: Response headers as a list of {"name": .., "value": ..} objects
+        :param body: Response body, large bodies are passed as a seekable file positioned at the start
+        """
+        if isinstance(body, bytes):
+            body = io.BytesIO(body)
+        digest = hashlib.sha1()
+        for chunk in iter(lambda: body.read(self.CHUNK_SIZE), b""):
+            digest.update(chunk)
+        body.seek(0)
+
+        body_name = f"bodies/{digest.hexdigest()}"
+        with self._lock:
+            if body_name not in self._stored_bodies:
+                with self._zip.open(body_name, "w", force_zip64=True) as out:
+                    shutil.copyfileobj(body, out, self.CHUNK_SIZE)
+                self._stored_bodies.add(body_name)
+            self._index.setdefault(key, []).append({"status": status, "headers": headers, "body": body_name})
+
+    def get(self, key: str) -> tuple[int, List[dict], BinaryIO] | None:
+        """
+        Returns next recorded (status, headers, body) for the request or None if the request was not recorded.
+        The body is a file object streamed from the archive.
+        """
+        with self._lock:
+            responses = self._index.get(key)
+            if not responses:
+                self.missed_requests += 1
+                return None
+            position = self._replay_positions.get(key, 0)
+            self._replay_positions[key] = position + 1
+            response = responses[min(position, len(responses) - 1)]
+            return response["status"], response["headers"], self._zip.open(response["body"])
+
+    def close(self):
+        with self._lock:
+            if self.is_recording:
+                self._zip.writestr(self.INDEX_FILE, json.dumps(self._index))
+            self._zip.close()
+        if self.is_recording:
+            logging.info("Recorded %i distinct requests into %s", len(self._index), self.file_path)
+        elif self.missed_requests:
+            logging.warning("%i requests were not found in the archive %s", self.missed_requests, self.file_path)
+
+
+class ArchiveHTTPAdapter(HTTPAdapter):
+    """
+    Records or replays the requests made outside the browser through a requests Session.
+    """
+
+    def __init__(self, archive: NetworkArchive, **kwargs):
+        super().__init__(**kwargs)
+        self.archive = archive
+
+    def send(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        key = NetworkArchive.request_key(request.method, request.url, request.body)
+        if self.archive.is_recording:
+            response = super().send(request, **kwargs)
+            headers = [{"name": k, "value": v} for k, v in response.raw.headers.items()]
+            # the body is spooled to a temporary file, so large downloads are not held in memory,
+            # the raw stream is replaced so it can be read again
+            body = tempfile.TemporaryFile()
+            for chunk in response.raw.stream(NetworkArchive.CHUNK_SIZE, decode_content=False):
+                body.write(chunk)
+            body.seek(0)
+            self.archive.add(key, response.status_code, headers, body)
+            body.seek(0)
+            response.raw = self._build_raw(response.status_code, headers, body)
+            return response
+
+        recorded = self.archive.get(key)
+        if recorded is None:
+            if self.archive.allow_live_requests:
+                return super().send(request, **kwargs)
+            raise requests.ConnectionError(f"Request {key} is not present in the network archive.", request=request)
+
+        status, headers, body = recorded
+        response = self.build_response(request, self._build_raw(status, headers, body))
+        response.elapsed = timedelta(0)
+        return response
+
+    @staticmethod
+    def _build_raw(status: int, headers: List[dict], body: BinaryIO) -> HTTPResponse:
+        return HTTPResponse(
+            body=body,
+            headers=HTTPHeaderDict([(h["name"], h["value"]) for h in headers]),
+            status=status,
+            preload_content=False,
+            decode_content=True,
+        )
+
+
+class FetchInterceptor:
+    """
+    Records or replays all browser responses through the DevTools Fetch domain.
+
+    Runs its own event loop in a background thread and auto-attaches to every page of the browser,
+    including tabs and pop-ups opened later.
+    """
+
+    # Chrome returns the bodies of redirects as unavailable
+    NO_BODY_STATUSES = range(300, 400)
+    # the bodies are stored decoded, so the original encoding and length do not apply on replay
+    SKIPPED_HEADERS = ["content-encoding", "content-length"]
+
+    def __init__(self, driver: WebDriver, archive: NetworkArchive):
+        self.driver = driver
+        self.archive = archive
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+        self._connection = None
+
+    def start(self):
+        self._thread.start()
+        websocket_url = CdpConnection.get_browser_websocket_url(self.driver)
+        asyncio.run_coroutine_threadsafe(self._start(websocket_url), self._loop).result(timeout=60)
+        logging.info("Network %s mode enabled.", self.archive.mode)
+
+    def stop(self):
+        if self._connection:
+            asyncio.run_coroutine_threadsafe(self._connection.close(), self._loop).result(timeout=60)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+    async def _start(self, websocket_url: str):
+        self._connection = CdpConnection(websocket_url)
+        await self._connection.connect()
+        self._connection.on("Target.attachedToTarget", self._on_attached)
+        self._connection.on("Fetch.requestPaused", self._on_request_paused)
+        await self._connection.send(
+            "Target.setAutoAttach", {"autoAttach": True, "waitForDebuggerOnStart": True, "flatten": True}
+        )
+
+    async def _on_attached(self, params: dict, _):
+        session_id = params["sessionId"]
+        request_stage = "Response" if self.archive.is_recording else "Request"
+        try:
+            if params["targetInfo"]["type"] in ("page", "iframe", "worker"):
+                await self._connection.send(
+                    "Fetch.enable", {"patterns": [{"urlPattern": "*", "requestStage": request_stage}]}, session_id
+                )
+                await self._connection.send(
+                    "Target.setAutoAttach",
+                    {"autoAttach": True, "waitForDebuggerOnStart": True, "flatten": True},
+                    session_id,
+                )
+        finally:
+            await self._connection.send("Runtime.runIfWaitingForDebugger", session_id=session_id)
+
+    async def _on_request_paused(self, params: dict, session_id: str):
+        request = params["request"]
+        key = NetworkArchive.request_key(request["method"], request["url"], self._get_post_data(request))
+        try:
+            if self.archive.is_recording:
+                await self._record(params, key, session_id)
+            else:
+                await self._replay(params, key, session_id)
+        except CdpError as e:
+            # the request may be already cancelled by the page
+            logging.debug("Failed to process request %s: %s", key, e.msg)
+
+    async def _record(self, params: dict, key: str, session_id: str):
+        status = params.get("responseStatusCode")
+        if status is not None:
+            body = b""
+            if status not in self.NO_BODY_STATUSES:
+                try:
+                    result = await self._connection.send(
+                        "Fetch.getResponseBody", {"requestId": params["requestId"]}, session_id
+                    )
+                    body = base64.b64decode(result["body"]) if result["base64Encoded"] else result["body"].encode()
+                except CdpError as e:
+                    # an empty body would be replayed silently, the missing entry fails on replay instead
+                    logging.warning("Response body of %s is not available, it is not recorded: %s", key, e.msg)
+                    body = None
+            if body is not None:
+                headers = [
+                    h for h in params.get("responseHeaders", []) if h["name"].lower() not in self.SKIPPED_HEADERS
+                ]
+                self.archive.add(key, status, headers, body)
+        await self._connection.send("Fetch.continueRequest", {"requestId": params["requestId"]}, session_id)
+
+    async def _replay(self, params: dict, key: str, session_id: str):
+        recorded = self.archive.get(key)
+        if recorded is None:
+            if self.archive.allow_live_requests:
+                await self._connection.send("Fetch.continueRequest", {"requestId": params["requestId"]}, session_id)
+                return
+            logging.warning("Request %s is not present in the network archive.", key)
+            await self._connection.send(
+                "Fetch.failRequest",
+                {"requestId": params["requestId"], "errorReason": "InternetDisconnected"},
+                session_id,
+            )
+            return
+
+        status, headers, body_file = recorded
+        with body_file:
+            body = body_file.read()
+        await self._connection.send(
+            "Fetch.fulfillRequest",
+            {
+                "requestId": params["requestId"],
+                "responseCode": status,
+                "responseHeaders": headers,
+                "body": base64.b64encode(body).decode(),
+            },
+            session_id,
+        )
+
+    @staticmethod
+    def _get_post_data(request: dict) -> bytes | None:
+        if request.get("postDataEntries"):
+            return b"".join(base64.b64decode(e.get("bytes", "")) for e in request["postDataEntries"])
+        if request.get("postData"):
+            return request["postData"].encode("utf-8")
+        return None
@@ -0,0 +1,319 @@
+import heapq
+import json
+import logging
+from datetime import datetime, timezone
+from typing import List
+from urllib.parse import parse_qsl, urlparse
+
+import requests
+from keboola.component import ComponentBase
+
+from webcrawler.performance_log import PerformanceLog
+
+
+class NetworkSummary:
+    """
+    Running totals of the recorded traffic. Only aggregates are kept, the entries themselves are not buffered.
+    """
+
+    def __init__(self, slowest_count=10):
+        self.slowest_count = slowest_count
+        self.total_requests = 0
+        self.failed_requests = 0
+        self.total_bytes = 0
+        self.bytes_per_domain = {}
+        self._slowest = []
+
+    def add(self, url: str, time_ms: float, transfer_size: int, failed=False):
+        self.total_requests += 1
+        if failed:
+            self.failed_requests += 1
+        transfer_size = max(transfer_size, 0)
+        self.total_bytes += transfer_size
+        domain = urlparse(url).netloc or urlparse(url).scheme
+        self.bytes_per_domain[domain] = self.bytes_per_domain.get(domain, 0) + transfer_size
+
+        item = (time_ms, self.total_requests, url)
+        if len(self._slowest) < self.slowest_count:
+            heapq.heappush(self._slowest, item)
+        else:
+            heapq.heappushpop(self._slowest, item)
+
+    @property
+    def slowest_requests(self) -> List[dict]:
+        return [{"url": url, "time_ms": round(t, 2)} for t, _, url in sorted(self._slowest, reverse=True)]
+
+    def to_dict(self) -> dict:
+        return {
+            "total_requests": self.total_requests,
+            "failed_requests": self.failed_requests,
+            "total_bytes": self.total_bytes,
+            "bytes_per_domain": dict(sorted(self.bytes_per_domain.items(), key=lambda i: i[1], reverse=True)),
+            "slowest_requests": self.slowest_requests,
+        }
+
+
+class HarWriter:
+    """
+    Writes HAR 1.2 file entry by entry, so the whole log is never held in memory.
+    """
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        self._out = None
+        self._entry_count = 0
+
+    def open(self):
+        self._out = open(self.file_path, "w+", encoding="utf-8")
+        creator = {"name": "kds-team.ex-web-content-crawler", "version": ""}
+        self._out.write('{"log":{"version":"1.2","creator":' + json.dumps(creator) + ',"pages":[],"entries":[')
+
+    def write_entry(self, entry: dict):
+        if self._entry_count:
+            self._out.write(",")
+        self._out.write(json.dumps(entry))
+        self._entry_count += 1
+
+    def close(self, summary: dict):
+        self._out.write('],"_summary":' + json.dumps(summary) + "}}")
+        self._out.close()
+        self._out = None
+
+
+class NetworkRecorder:
+    """
+    Records the browser network activity collected from the chromedriver performance log and the HTTP downloads
+    made outside of the browser into a HAR file in out/files.
+    """
+
+    DEFAULT_FILE_NAME = "network.har"
+    DEFAULT_TAGS = ["network_log"]
+    # the session credentials are not stored in the output file
+    REDACTED_HEADERS = ["cookie", "set-cookie", "authorization", "proxy-authorization"]
+    REDACTED_VALUE = "[redacted]"
+
+    def __init__(
+        self,
+        component_interface: ComponentBase,
+        runid="",
+        file_name: str = None,
+        slowest_count=10,
+        tags: List[str] = None,
+    ):
+        """
+
+        :param component_interface: Component used to create the output file definition
+        :param runid: Run id used to tag and name the resulting file
+        :param file_name: Name of the resulting HAR file
+        :param slowest_count: Number of the slowest requests reported in the summary
+        :param tags: Additional tags added to the resulting file.
+        """
+        self.component_interface = component_interface
+        self.runid = runid or ""
+        self.summary = NetworkSummary(slowest_count)
+
+        file_name = file_name or self.DEFAULT_FILE_NAME
+        tags = self.DEFAULT_TAGS + (tags or [])
+        if self.runid:
+            tags.append(str(self.runid))
+            file_name = f"{self.runid}_{file_name}"
+        self._out_file = component_interface.create_out_file_definition(file_name, tags=tags)
+        self._writer = HarWriter(self._out_file.full_path)
+        self._writer.open()
+        # only requests in flight are kept
+        self._pending = {}
+
+    def register(self, performance_log: PerformanceLog):
+        performance_log.register(self._process_messages, network=True)
+
+    def record_http_response(self, response: requests.Response, content_size: int, elapsed: float):
+        """
+        Records a request made outside the browser, e.g. the streamed download of DownloadPageContent.
+
+        :param response: The response object, the content is expected to be consumed already
+        :param content_size: Number of body bytes received
+        :param elapsed: Total time in seconds including the download of the body
+        """
+        request = response.request
+        wait_ms = response.elapsed.total_seconds() * 1000
+        total_ms = max(elapsed * 1000, wait_ms)
+        started = datetime.now(timezone.utc).timestamp() - elapsed
+        headers_size = sum(len(k) + len(v) + 4 for k, v in response.headers.items())
+        transfer_size = int(response.headers.get("Content-Length") or content_size) + headers_size
+
+        entry = {
+            "startedDateTime": self._format_timestamp(started),
+            "time": total_ms,
+            "request": self._build_request(request.method, request.url, dict(request.headers)),
+            "response": {
+                "status": response.status_code,
+                "statusText": response.reason or "",
+                "httpVersion": "HTTP/1.1",
+                "cookies": [],
+                "headers": self._build_headers(dict(response.headers)),
+                "content": {"size": content_size, "mimeType": response.headers.get("Content-Type", "")},
+                "redirectURL": response.headers.get("Location", ""),
+                "headersSize": headers_size,
+                "bodySize": transfer_size - headers_size,
+                "_transferSize": transfer_size,
+            },
+            "cache": {},
+            "timings": {"send": 0, "wait": wait_ms, "receive": total_ms - wait_ms},
+            "_source": "http",
+        }
+        self._write_entry(entry, response.url, transfer_size, failed=response.status_code >= 400)
+
+    def close(self):
+        """
+        Flushes requests still in flight, writes the summary and the file manifest.
+        """
+        for request_id in list(self._pending.keys()):
+            self._finish(request_id, None, error="Request not finished when recording stopped.")
+
+        summary = self.summary.to_dict()
+        self._writer.close(summary)
+        self.component_interface.write_manifest(self._out_file)
+
+        logging.info(
+            "Network log stored in %s: %i requests (%i failed), %.1f kB transferred in total.",
+            self._out_file.name,
+            summary["total_requests"],
+            summary["failed_requests"],
+            summary["total_bytes"] / 1024,
+        )
+        for domain, size in list(summary["bytes_per_domain"].items())[:10]:
+            logging.info("  %s: %.1f kB", domain, size / 1024)
+        for request in summary["slowest_requests"]:
+            logging.info("  %.0f ms %s", request["time_ms"], request["url"])
+
+    def _process_messages(self, messages: List[dict]):
+        for message in messages:
+            method = message.get("method")
+            params = message.get("params", {})
+            if method == "Network.requestWillBeSent":
+                self._on_request(params)
+            elif method == "Network.responseReceived":
+                if params["requestId"] in self._pending:
+                    self._pending[params["requestId"]]["response"] = params["response"]
+            elif method == "Network.dataReceived":
+                if params["requestId"] in self._pending:
+                    self._pending[params["requestId"]]["data_length"] += params.get("dataLength", 0)
+            elif method == "Network.loadingFinished":
+                self._finish(params["requestId"], params)
+            elif method == "Network.loadingFailed":
+                self._finish(params["requestId"], params, error=params.get("errorText", "failed"))
+
+    def _on_request(self, params: dict):
+        request_id = params["requestId"]
+        redirect_response = params.get("redirectResponse")
+        if redirect_response and request_id in self._pending:
+            # redirects share the request id, the previous hop ends with the redirect response
+            self._pending[request_id]["response"] = redirect_response
+            self._finish(request_id, {"timestamp": params["timestamp"], "encodedDataLength": -1})
+
+        self._pending[request_id] = {
+            "request": params["request"],
+            "timestamp": params["timestamp"],
+            "wall_time": params.get("wallTime"),
+            "response": None,
+            "data_length": 0,
+        }
+
+    def _finish(self, request_id: str, params: dict | None, error: str = None):
+        pending = self._pending.pop(request_id, None)
+        if not pending:
+            return
+
+        request = pending["request"]
+        response = pending["response"] or {}
+        end_timestamp = params.get("timestamp", pending["timestamp"]) if params else pending["timestamp"]
+        transfer_size = (params or {}).get("encodedDataLength", -1)
+        if transfer_size < 0:
+            transfer_size = response.get("encodedDataLength", 0)
+
+        timings, total_ms = self._build_timings(response.get("timing"), pending["timestamp"], end_timestamp)
+        entry = {
+            "startedDateTime": self._format_timestamp(pending["wall_time"]),
+            "time": total_ms,
+            "request": self._build_request(request.get("method", "GET"), request["url"], request.get("headers", {})),
+            "response": {
+                "status": response.get("status", 0),
+                "statusText": response.get("statusText", ""),
+                "httpVersion": response.get("protocol", ""),
+                "cookies": [],
+                "headers": self._build_headers(response.get("headers", {})),
+                "content": {"size": pending["data_length"], "mimeType": response.get("mimeType", "")},
+                "redirectURL": response.get("headers", {}).get("location", ""),
+                "headersSize": -1,
+                "bodySize": -1,
+                "_transferSize": transfer_size,
+            },
+            "cache": {},
+            "timings": timings,
+            "_source": "browser",
+        }
+        if response.get("remoteIPAddress"):
+            entry["serverIPAddress"] = response["remoteIPAddress"]
+        if error:
+            entry["_error"] = error
+        self._write_entry(entry, request["url"], transfer_size, failed=bool(error) or response.get("status", 0) >= 400)
+
+    def _write_entry(self, entry: dict, url: str, transfer_size: int, failed: bool):
+        self._writer.write_entry(entry)
+        self.summary.add(url, entry["time"], transfer_size, failed=failed)
+
+    @staticmethod
+    def _build_timings(timing: dict | None, start_timestamp: float, end_timestamp: float):
+        total_ms = max((end_timestamp - start_timestamp) * 1000, 0)
+        if not timing:
+            return {"send": 0, "wait": 0, "receive": total_ms}, total_ms
+
+        def _duration(start_key, end_key):
+            if timing.get(start_key, -1) < 0:
+                return -1
+            return timing[end_key] - timing[start_key]
+
+        first_activity = next(
+            (timing[k] for k in ("dnsStart", "connectStart", "sendStart") if timing.get(k, -1) >= 0), 0
+        )
+        request_offset_ms = (timing["requestTime"] - start_timestamp) * 1000
+        timings = {
+            "blocked": max(request_offset_ms + first_activity, 0),
+            "dns": _duration("dnsStart", "dnsEnd"),
+            "connect": _duration("connectStart", "connectEnd"),
+            "ssl": _duration("sslStart", "sslEnd"),
+            "send": max(timing["sendEnd"] - timing["sendStart"], 0),
+            "wait": max(timing["receiveHeadersEnd"] - timing["sendEnd"], 0),
+            "receive": max((end_timestamp - timing["requestTime"]) * 1000 - timing["receiveHeadersEnd"], 0),
+        }
+        total_ms = sum(v for k, v in timings.items() if v > 0 and k != "ssl")
+        return timings, total_ms
+
+    @staticmethod
+    def _build_request(method: str, url: str, headers: dict) -> dict:
+        return {
+            "method": method,
+            "url": url,
+            "httpVersion": "",
+            "cookies": [],
+            "headers": NetworkRecorder._build_headers(headers),
+            "queryString": [{"name": k, "value": v} for k, v in parse_qsl(urlparse(url).query)],
+            "headersSize": -1,
+            "bodySize": -1,
+        }
+
+    @staticmethod
+    def _build_headers(headers: dict) -> List[dict]:
+        return [
+            {
+                "name": k,
+                "value": NetworkRecorder.REDACTED_VALUE if k.lower() in NetworkRecorder.REDACTED_HEADERS else str(v),
+            }
+            for k, v in headers.items()
+        ]
+
+    @staticmethod
+    def _format_timestamp(timestamp: float | None) -> str:
+        if timestamp is None:
+            timestamp = datetime.now(timezone.utc).timestamp()
+        return datetime.fromtimestamp(timestamp, timezone.utc).isoformat()
@@ -0,0 +1,70 @@
+import json
+import logging
+from typing import Callable, List
+
+from selenium import webdriver
+from selenium.common.exceptions import WebDriverException
+
+
+class PerformanceLog:
+    """
+    Shared reader of the chromedriver performance log.
+
+    The log is drained on each read, so all consumers (tracing, network recording) must read through a single instance.
+    Each consumer receives the list of DevTools messages (dicts with `method` and `params` keys) collected since
+    the last flush.
+    """
+
+    def __init__(self):
+        self._consumers: List[Callable[[List[dict]], None]] = []
+        self._perf_logging_prefs = {"enableNetwork": False, "enablePage": False}
+        self._trace_categories = []
+        self._driver = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self._consumers)
+
+    def register(self, consumer: Callable[[List[dict]], None], network=False, trace_categories: str = None):
+        """
+
+        :param consumer: Callable receiving the list of collected DevTools messages.
+        :param network: Enable collection of the Network domain events.
+        :param trace_categories: Comma separated Chrome trace categories to collect.
+        """
+        self._consumers.append(consumer)
+        if network:
+            self._perf_logging_prefs["enableNetwork"] = True
+        if trace_categories:
+            self._trace_categories.extend(c for c in trace_categories.split(",") if c not in self._trace_categories)
+
+    def configure_options(self, options: webdriver.ChromeOptions):
+        """
+        The performance log must be enabled before the browser starts.
+        """
+        if not self.enabled:
+            return
+        prefs = dict(self._perf_logging_prefs)
+        if self._trace_categories:
+            prefs["traceCategories"] = ",".join(self._trace_categories)
+        options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+        options.add_experimental_option("perfLoggingPrefs", prefs)
+
+    def attach(self, driver: webdriver.Chrome):
+        self._driver = driver
+
+    def flush(self):
+        """
+        Drains the performance log and passes the collected messages to all consumers.
+        """
+        if not self.enabled or not self._driver:
+            return
+        try:
+            entries = self._driver.get_log("performance")
+        except WebDriverException as e:
+            logging.warning("Failed to read the performance log: %s", e.msg)
+            return
+
+        messages = [json.loads(entry["message"])["message"] for entry in entries]
+        for consumer in self._consumers:
+            consumer(messages)
@@ -0,0 +1,163 @@
+import cProfile
+import gzip
+import json
+import logging
+import re
+import time
+from contextlib import contextmanager
+from typing import List
+
+from keboola.component import ComponentBase
+from selenium import webdriver
+from selenium.common.exceptions import WebDriverException
+
+from webcrawler.performance_log import PerformanceLog
+
+
+class CrawlerProfiler:
+    """
+    Opt-in profiler capturing Chrome traces or JS CPU profiles around crawler steps or selected actions.
+
+    The captured data is stored as gzipped JSON in the out/files folder, tagged with the step description and run id.
+    A cProfile dump of the component itself can be captured alongside.
+    """
+
+    MODE_TRACING = "tracing"
+    MODE_PROFILER = "profiler"
+    SUPPORTED_MODES = [MODE_TRACING, MODE_PROFILER]
+
+    DEFAULT_TRACE_CATEGORIES = (
+        "devtools.timeline,disabled-by-default-devtools.timeline,v8.execute,blink.user_timing,loading,netlog"
+    )
+    DEFAULT_TAGS = ["profiling"]
+
+    def __init__(
+        self,
+        component_interface: ComponentBase,
+        runid="",
+        mode=MODE_TRACING,
+        actions: List[str] = None,
+        trace_categories: str = None,
+        tags: List[str] = None,
+    ):
+        """
+
+        :param component_interface: Component used to create the output file definitions
+        :param runid: Run id used to tag and name the resulting files
+        :param mode: `tracing` captures the Chrome timeline (JS, layout, paint, network),
+        `profiler` captures the JS CPU profile only.
+        :param actions: Optional list of action names to profile. If empty, whole steps are profiled.
+        :param trace_categories: Comma separated Chrome trace categories used in the `tracing` mode.
+        :param tags: Additional tags added to the resulting files.
+        """
+        if mode not in self.SUPPORTED_MODES:
+            raise ValueError(f"Unsupported profiling mode '{mode}', supported values are: {self.SUPPORTED_MODES}")
+        self.component_interface = component_interface
+        self.runid = runid or ""
+        self.mode = mode
+        self.actions = actions or []
+        self.trace_categories = trace_categories or self.DEFAULT_TRACE_CATEGORIES
+        self.tags = self.DEFAULT_TAGS + (tags or [])
+
+        self._driver = None
+        self._performance_log = None
+        self._trace_events = None
+        self._component_profile = None
+        self._capture_index = 0
+
+    @property
+    def profiles_steps(self) -> bool:
+        return not self.actions
+
+    def profiles_action(self, action_name: str) -> bool:
+        return action_name in self.actions
+
+    def register(self, performance_log: PerformanceLog):
+        """
+        Chrome tracing is collected through the chromedriver performance log.
+        """
+        self._performance_log = performance_log
+        if self.mode == self.MODE_TRACING:
+            performance_log.register(self._collect_trace_events, trace_categories=self.trace_categories)
+
+    def attach(self, driver: webdriver.Chrome):
+        self._driver = driver
+        if self.mode == self.MODE_PROFILER:
+            self._driver.execute_cdp_cmd("Profiler.enable", {})
+
+    def start_component_profile(self):
+        self._component_profile = cProfile.Profile()
+        self._component_profile.enable()
+
+    def stop_component_profile(self):
+        if not self._component_profile:
+            return
+        self._component_profile.disable()
+        out_file = self._create_out_file("component.prof")
+        self._component_profile.dump_stats(out_file.full_path)
+        self.component_interface.write_manifest(out_file)
+        self._component_profile = None
+        logging.info("Component cProfile stats stored in %s", out_file.name)
+
+    @contextmanager
+    def profile(self, label: str):
+        """
+        Captures the browser activity of the wrapped block and stores it in a separate file.
+
+        :param label: Step or action description used in the file name and tags.
+        """
+        self._start_capture()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            try:
+                self._stop_capture(label, elapsed)
+            except WebDriverException as e:
+                # do not mask the original failure of the profiled block
+                logging.warning("Failed to collect profile of '%s': %s", label, e.msg)
+
+    def _start_capture(self):
+        if self.mode == self.MODE_TRACING:
+            # drain events collected outside of the profiled block
+            self._performance_log.flush()
+            self._trace_events = []
+        else:
+            self._driver.execute_cdp_cmd("Profiler.start", {})
+
+    def _stop_capture(self, label: str, elapsed: float):
+        self._capture_index += 1
+        file_prefix = f"{self._capture_index:03d}_{self._slugify(label)}"
+        metadata = {"label": label, "runid": self.runid, "elapsed_seconds": elapsed}
+
+        if self.mode == self.MODE_TRACING:
+            self._performance_log.flush()
+            content = {"traceEvents": self._trace_events, "metadata": metadata}
+            self._trace_events = None
+            file_name = f"{file_prefix}.trace.json.gz"
+        else:
+            content = self._driver.execute_cdp_cmd("Profiler.stop", {})["profile"]
+            file_name = f"{file_prefix}.cpuprofile.gz"
+
+        out_file = self._create_out_file(file_name, extra_tags=[label])
+        with gzip.open(out_file.full_path, "wt", encoding="utf-8") as out:
+            json.dump(content, out)
+        self.component_interface.write_manifest(out_file)
+        logging.info("Profile of '%s' (%.2fs) stored in %s", label, elapsed, out_file.name)
+
+    def _collect_trace_events(self, messages: List[dict]):
+        if self._trace_events is None:
+            return
+        self._trace_events.extend(m["params"] for m in messages if m.get("method") == "Tracing.dataCollected")
+
+    def _create_out_file(self, name: str, extra_tags: List[str] = None):
+        tags = self.tags + [t for t in (extra_tags or []) if t]
+        if self.runid:
+            tags.append(str(self.runid))
+            name = f"{self.runid}_{name}"
+        return self.component_interface.create_out_file_definition(name, tags=tags)
+
+    @staticmethod
+    def _slugify(label: str) -> str:
+        return re.sub(r"[^A-Za-z0-9]+", "_", label or "").strip("_")[:50] or "unnamed"
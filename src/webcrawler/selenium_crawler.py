@@ -1,21 +1,35 @@
 import abc
 import base64
+import hashlib
+import io
 import json
 import logging
 import os
 import random
+import shutil
+import tempfile
 import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import nullcontext
 from typing import List
+from urllib.parse import urldefrag
 
 import requests
-from keboola.component import ComponentBase
+from keboola.component import ComponentBase, UserException
 from selenium import webdriver
-from selenium.common.exceptions import WebDriverException
+from selenium.common.exceptions import TimeoutException, WebDriverException
 from selenium.webdriver import ActionChains
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support import expected_conditions as ec
 from selenium.webdriver.support.ui import WebDriverWait
 
+from webcrawler.driver_backends import DriverBackend, LocalDriverBackend
+from webcrawler.latency import AdaptiveTimeouts
+from webcrawler.network_archive import ArchiveHTTPAdapter, FetchInterceptor, NetworkArchive
+from webcrawler.network_recorder import NetworkRecorder
+from webcrawler.performance_log import PerformanceLog
+from webcrawler.profiling import CrawlerProfiler
+
 
 class CrawlerAction:
     KEY_ACTION_PARAMETERS = "action_parameters"
@@ -25,10 +39,31 @@ class CrawlerAction:
     def execute(self, driver: webdriver, **extra_args):
         pass
 
+    @staticmethod
+    def _create_http_session(cookies: List[dict], network_archive: NetworkArchive = None) -> requests.Session:
+        """
+        Creates session for requests made outside the browser, sharing the browser cookies.
+        """
+        s = requests.Session()
+        CrawlerAction._set_session_cookies(s, cookies)
+        if network_archive:
+            adapter = ArchiveHTTPAdapter(network_archive)
+            s.mount("http://", adapter)
+            s.mount("https://", adapter)
+        return s
+
+    @staticmethod
+    def _set_session_cookies(session: requests.Session, cookies: List[dict]):
+        for cookie in cookies:
+            session.cookies.set(cookie["name"], cookie["value"])
+
     # element actions
 
 
 class ClickElementToDownload(CrawlerAction):
+    # temporary files of downloads in progress
+    PARTIAL_DOWNLOAD_SUFFIXES = (".crdownload",)
+
     def __init__(self, xpath: str, delay=30, timeout=60, result_file_name=None):
         """
 
@@ -44,10 +79,19 @@ class ClickElementToDownload(CrawlerAction):
 
     def execute(self, driver: webdriver, **extra_args):
         download_folder = extra_args.pop("download_folder")
+        adaptive_timeouts: AdaptiveTimeouts = extra_args.get("adaptive_timeouts")
+        latency_key = f"{type(self).__name__} {self.xpath}"
+        # the download is awaited up to the timeout after the delay, so a shorter delay is safe
+        delay = adaptive_timeouts.timeout(latency_key, self.delay) if adaptive_timeouts else self.delay
+
         exisitng_files = [f for f in os.listdir(download_folder) if os.path.isfile(os.path.join(download_folder, f))]
+        click_time = time.time()
         driver.find_element(By.XPATH, self.xpath).click()
-        time.sleep(self.delay)
-        self._wait_until_new_file(exisitng_files, self.timeout, download_folder)
+        time.sleep(delay)
+        new_files = self._wait_until_new_file(exisitng_files, self.timeout, download_folder)
+        if adaptive_timeouts:
+            finished = max(os.path.getmtime(os.path.join(download_folder, f)) for f in new_files)
+            adaptive_timeouts.add(latency_key, max(finished - click_time, 0.0))
 
     def _wait_until_new_file(self, original_files, timeout, download_folder):
         # wait until new file is present
@@ -56,7 +100,9 @@ class ClickElementToDownload(CrawlerAction):
         is_timedout = False
         while not new_files and not is_timedout:
             existng_files = [f for f in os.listdir(download_folder) if os.path.isfile(os.path.join(download_folder, f))]
-            new_files = [f for f in existng_files if f not in original_files]
+            new_files = [
+                f for f in existng_files if f not in original_files and not f.endswith(self.PARTIAL_DOWNLOAD_SUFFIXES)
+            ]
             elapsed_time = time.time() - start_time
             if elapsed_time > timeout:
                 is_timedout = True
@@ -147,8 +193,36 @@ class WaitForElement(CrawlerAction):
         self.delay = delay
 
     def execute(self, driver: webdriver, **extra_args):
-        wait = WebDriverWait(driver, self.delay)
-        el = wait.until(ec.visibility_of_element_located((By.XPATH, self.xpath)))
+        condition = ec.visibility_of_element_located((By.XPATH, self.xpath))
+        adaptive_timeouts: AdaptiveTimeouts = extra_args.get("adaptive_timeouts")
+        if not adaptive_timeouts:
+            wait = WebDriverWait(driver, self.delay)
+            el = wait.until(condition)
+            return el
+
+        latency_key = f"{type(self).__name__} {self.xpath}"
+        start = time.perf_counter()
+        if not extra_args.get("fail_fast"):
+            # the wait ends as soon as the element is visible, a shorter timeout would not save any time
+            el = WebDriverWait(driver, self.delay).until(condition)
+            adaptive_timeouts.add(latency_key, time.perf_counter() - start)
+            return el
+
+        # a missing element is expected in the test of a conditional action, it fails on the adapted timeout
+        timeout = adaptive_timeouts.timeout(latency_key, self.delay)
+        try:
+            el = WebDriverWait(driver, timeout).until(condition)
+        except TimeoutException:
+            if timeout < self.delay:
+                logging.warning(
+                    "Element %s not visible within the adaptive timeout %.1fs shorter than the configured %ss, "
+                    "the condition is evaluated as failed.",
+                    self.xpath,
+                    timeout,
+                    self.delay,
+                )
+            raise
+        adaptive_timeouts.add(latency_key, time.perf_counter() - start)
         return el
 
 
@@ -188,7 +262,9 @@ class DownloadPageContent(CrawlerAction):
 
         url = self.url or driver.current_url
         if self.use_stream_get:
-            self._get_content_via_get(driver, url, res_file_path)
+            self._get_content_via_get(
+                driver, url, res_file_path, extra_args.get("network_recorder"), extra_args.get("network_archive")
+            )
         else:
             self._get_content_via_browser(driver, url, res_file_path)
 
@@ -197,17 +273,32 @@ class DownloadPageContent(CrawlerAction):
         with open(res_file_path, "w+") as out:
             out.write(driver.page_source)
 
-    def _get_content_via_get(self, driver: webdriver, url: str, res_file_path: str):
-        # get cookies
-        cookies = driver.get_cookies()
-        s = requests.Session()
-        for cookie in cookies:
-            s.cookies.set(cookie["name"], cookie["value"])
+    def _get_content_via_get(
+        self,
+        driver: webdriver,
+        url: str,
+        res_file_path: str,
+        network_recorder: NetworkRecorder = None,
+        network_archive: NetworkArchive = None,
+    ):
+        s = self._create_http_session(driver.get_cookies(), network_archive)
+        res, content_size, elapsed = self._stream_to_file(s, url, res_file_path)
+        if network_recorder:
+            network_recorder.record_http_response(res, content_size, elapsed)
 
-        res = s.get(url, stream=True)
+    @staticmethod
+    def _stream_to_file(session: requests.Session, url: str, res_file_path: str) -> tuple:
+        """
+        :return: The response, the number of body bytes and the total time of the download in seconds.
+        """
+        start = time.perf_counter()
+        content_size = 0
+        res = session.get(url, stream=True)
         with open(res_file_path, "wb+") as out:
             for chunk in res.iter_content(chunk_size=8192):
                 out.write(chunk)
+                content_size += len(chunk)
+        return res, content_size, time.perf_counter() - start
 
 
 class SaveCookieFile(CrawlerAction):
@@ -239,6 +330,8 @@ class SaveCookieFile(CrawlerAction):
 
 
 class ConditionalAction(CrawlerAction):
+    NESTED_ACTION_PARAMETERS = ["test_action", "result_action", "fail_action"]
+
     def __init__(self, test_action, result_action=None, fail_action=None):
         """
 
@@ -258,7 +351,7 @@ class ConditionalAction(CrawlerAction):
     def execute(self, driver: webdriver, **extra_args):
         logging.info("Executing test action %s", type(self.test_action).__name__)
         try:
-            self.test_action.execute(driver, **extra_args)
+            self.test_action.execute(driver, **{**extra_args, "fail_fast": True})
         except WebDriverException as e:
             logging.debug(
                 "The testing action %s with params [%s]  failed with error: %s",
@@ -283,6 +376,226 @@ class ConditionalAction(CrawlerAction):
             logging.info("No result action specified, continuing..")
 
 
+class FollowPagination(CrawlerAction):
+    """
+    Executes the nested actions on each page of a paged listing and follows the next page until the stop condition
+    is met. The content of all pages is appended to a single result file.
+
+    When the URL of the next page is known upfront, i.e. it is defined by `next_url_pattern` or the next element
+    is a link, the next page is downloaded over the HTTP session sharing the browser cookies while the current one
+    is being processed.
+    """
+
+    NESTED_ACTION_LIST_PARAMETERS = ["actions"]
+
+    def __init__(
+        self,
+        actions: list = None,
+        next_xpath: str = None,
+        next_url_pattern: str = None,
+        max_pages=100,
+        first_page=1,
+        stop_xpath: str = None,
+        result_file_name: str = None,
+        use_stream_get=True,
+        skip_header_lines=0,
+        delay=30,
+    ):
+        """
+
+        :param actions: Definitions of the actions executed on each page, the random wait is not applied between them.
+        :param next_xpath: XPATH of the element leading to the next page. Pagination stops when the element
+        is missing or disabled.
+        :param next_url_pattern: URL of the pages with the `{page}` placeholder, e.g. `https://example.com/?page={page}`
+        :param max_pages: Maximum number of processed pages.
+        :param first_page: Number of the current page, the following pages are numbered from it.
+        :param stop_xpath: XPATH of an element marking the last page.
+        :param result_file_name: Name of the file the content of each page is appended to.
+        :param use_stream_get: The content is downloaded over HTTP, otherwise the page source is stored.
+        :param skip_header_lines: Number of leading lines skipped in the content of each page except the first one,
+        e.g. the CSV header.
+        :param delay: Time in seconds to wait for the next page after clicking the next element.
+        """
+        errors = self.check_parameters(dict(next_xpath=next_xpath, next_url_pattern=next_url_pattern))
+        if errors:
+            raise ValueError(errors[0])
+        self.actions = actions or []
+        self.next_xpath = next_xpath
+        self.next_url_pattern = next_url_pattern
+        self.max_pages = max_pages
+        self.first_page = first_page
+        self.stop_xpath = stop_xpath
+        self.result_file_name = result_file_name
+        self.use_stream_get = use_stream_get
+        self.skip_header_lines = skip_header_lines
+        self.delay = delay
+
+    @staticmethod
+    def check_parameters(parameters: dict) -> List[str]:
+        if bool(parameters.get("next_xpath")) == bool(parameters.get("next_url_pattern")):
+            return ["exactly one of the parameters 'next_xpath' or 'next_url_pattern' must be specified"]
+        return []
+
+    def execute(self, driver: webdriver, **extra_args):
+        session = self._create_http_session([], extra_args.get("network_archive"))
+        network_recorder = extra_args.get("network_recorder")
+        download_content = bool(self.result_file_name and self.use_stream_get)
+        # without nested actions and conditions evaluated in the browser, the pages are downloaded over HTTP only
+        browser_navigation = bool(self.actions or self.next_xpath or self.stop_xpath) or not download_content
+
+        result_file = None
+        if self.result_file_name:
+            result_file = open(os.path.join(extra_args["download_folder"], self.result_file_name), "ab")
+        executor = ThreadPoolExecutor(max_workers=1)
+        try:
+            url = driver.current_url
+            download = self._submit_download(executor, session, driver, url) if download_content else None
+            last_digest = None
+            result = None
+            page_count = 0
+            for page_count in range(1, self.max_pages + 1):
+                page = self.first_page + page_count - 1
+                logging.info("Processing page %i: %s", page, url)
+                next_download = None
+                if download_content and self.next_url_pattern and page_count < self.max_pages:
+                    # the next URL is known upfront, the download overlaps with the nested actions
+                    next_url = self.next_url_pattern.format(page=page + 1)
+                    next_download = self._submit_download(executor, session, driver, next_url)
+
+                if browser_navigation:
+                    result = self._perform_nested_actions(driver, extra_args)
+
+                is_last = (
+                    result is not None
+                    or page_count == self.max_pages
+                    or bool(self.stop_xpath and driver.find_elements(By.XPATH, self.stop_xpath))
+                )
+                next_element, next_url = (None, None) if is_last else self._find_next_page(driver, page)
+                is_last = is_last or (next_element is None and next_url is None)
+
+                if download_content and not is_last and next_url and not next_download:
+                    next_download = self._submit_download(executor, session, driver, next_url)
+
+                if result_file:
+                    if download_content:
+                        page_content = self._get_downloaded_content(download, network_recorder)
+                    else:
+                        page_content = self._get_page_source(driver)
+                    if page_content is None or page_content[1] == last_digest:
+                        logging.info("Page %i is empty or same as the previous one, stopping pagination.", page)
+                        break
+                    last_digest = page_content[1]
+                    self._append_page(result_file, page_content[0], self.skip_header_lines if page_count > 1 else 0)
+
+                if is_last:
+                    break
+                if browser_navigation:
+                    previous_url = url
+                    self._go_to_next_page(driver, next_element, next_url)
+                    url = driver.current_url
+                    if download_content and urldefrag(url).url == urldefrag(previous_url).url:
+                        raise UserException(
+                            f"The next page of {previous_url} has the same URL, the pagination is driven by JavaScript "
+                            f"and cannot be downloaded with 'use_stream_get', set it to false to store the page source."
+                        )
+                else:
+                    url = next_url
+                if download_content:
+                    download = next_download or self._submit_download(executor, session, driver, url)
+        finally:
+            executor.shutdown(cancel_futures=True)
+            if result_file:
+                result_file.close()
+
+        logging.info("Pagination finished after %i pages.", page_count)
+        if isinstance(result, ExitAction):
+            return result
+
+    def _perform_nested_actions(self, driver: webdriver, extra_args: dict):
+        """
+        Returns the action stopping the pagination, i.e. BreakBlockExecution or ExitAction.
+        """
+        for action_def in self.actions:
+            # built for each page, some actions consume their parameters when executed
+            action = CrawlerActionBuilder.build_from_definition(action_def)
+            res = action.execute(driver, **extra_args)
+            if isinstance(res, (BreakBlockExecution, ExitAction)):
+                return res
+        return None
+
+    def _find_next_page(self, driver: webdriver, page: int) -> tuple:
+        """
+        Returns the element leading to the next page and the next page URL if known, (None, None) on the last page.
+        """
+        if self.next_url_pattern:
+            return None, self.next_url_pattern.format(page=page + 1)
+
+        elements = driver.find_elements(By.XPATH, self.next_xpath)
+        if not elements:
+            return None, None
+        element = elements[0]
+        if not element.is_displayed() or not element.is_enabled() or element.get_attribute("aria-disabled") == "true":
+            return None, None
+        href = element.get_attribute("href")
+        # e.g. href="#" is resolved to the current URL with a fragment, the page is changed by JavaScript
+        if not href or not href.startswith("http") or urldefrag(href).url == urldefrag(driver.current_url).url:
+            href = None
+        return element, href
+
+    def _go_to_next_page(self, driver: webdriver, next_element, next_url: str):
+        if next_element is None:
+            driver.get(next_url)
+            return
+        current_url = driver.current_url
+        next_element.click()
+        WebDriverWait(driver, self.delay).until(
+            ec.any_of(ec.staleness_of(next_element), ec.url_changes(current_url))
+        )
+
+    def _submit_download(self, executor: ThreadPoolExecutor, session: requests.Session, driver: webdriver, url: str):
+        # the cookies are read in the main thread, the driver is not thread safe
+        return executor.submit(self._download, session, driver.get_cookies(), url)
+
+    def _download(self, session: requests.Session, cookies: List[dict], url: str):
+        self._set_session_cookies(session, cookies)
+        start = time.perf_counter()
+        content = tempfile.TemporaryFile()
+        digest = hashlib.sha1()
+        res = session.get(url, stream=True)
+        for chunk in res.iter_content(chunk_size=8192):
+            content.write(chunk)
+            digest.update(chunk)
+        return res, content, digest.hexdigest(), time.perf_counter() - start
+
+    @staticmethod
+    def _get_downloaded_content(download: Future, network_recorder: NetworkRecorder = None):
+        """
+        Returns the (content, digest) of the downloaded page or None if the download failed or is empty.
+        """
+        res, content, digest, elapsed = download.result()
+        content_size = content.tell()
+        if network_recorder:
+            network_recorder.record_http_response(res, content_size, elapsed)
+        if res.status_code >= 400 or content_size == 0:
+            logging.info("The page %s returned status %i with %i bytes.", res.url, res.status_code, content_size)
+            content.close()
+            return None
+        content.seek(0)
+        return content, digest
+
+    @staticmethod
+    def _get_page_source(driver: webdriver):
+        page_source = driver.page_source.encode("utf-8")
+        return io.BytesIO(page_source), hashlib.sha1(page_source).hexdigest()
+
+    @staticmethod
+    def _append_page(result_file, content, skip_lines: int):
+        with content:
+            for _ in range(skip_lines):
+                content.readline()
+            shutil.copyfileobj(content, result_file)
+
+
 # System actions
 
 
@@ -393,6 +706,8 @@ class TakeScreenshot(CrawlerAction):
     Pauses execution for specified amount of time (s).
     """
 
+    PARAMETER_ALIASES = {"#imgbb_token": "imgbb_token"}
+
     def __init__(self, name, folder="screens", imgbb_token=None):
         """
 
@@ -429,23 +744,35 @@ class TakeScreenshot(CrawlerAction):
 class CrawlerActionBuilder:
     @staticmethod
     def build(action_name, **parameters):
-        # TODO: validate parameters based on type
+        # parameters are validated upfront by webcrawler.validation.ConfigValidator
         supported_actions = CrawlerActionBuilder.get_supported_actions()
         if action_name not in list(supported_actions.keys()):
             raise ValueError(
                 f"{action_name} is not supported action, supported values are: [{CrawlerAction.__subclasses__()}]"
             )
 
+        # e.g. encrypted parameters prefixed with #
+        aliases = getattr(supported_actions[action_name], "PARAMETER_ALIASES", {})
+        parameters = {aliases.get(k, k): v for k, v in parameters.items()}
+
         # special case of conditional action
         if action_name == "ConditionalAction":
             cond_action = supported_actions[action_name](**parameters)
             return CrawlerActionBuilder._build_conditional_action(cond_action)
-        elif action_name == "TakeScreenshot":
-            parameters["imgbb_token"] = parameters.pop("#imgbb_token", None)
-            return supported_actions[action_name](**parameters)
         else:
             return supported_actions[action_name](**parameters)
 
+    @staticmethod
+    def build_from_definition(action_def: dict):
+        """
+        Builds the action from its configuration, i.e. a dict with `action_name` and `action_parameters`.
+        """
+        action_pars = action_def.get(CrawlerAction.KEY_ACTION_PARAMETERS) or {}
+        # KBC bug, empty object as array
+        if isinstance(action_pars, list) and len(action_pars) == 0:
+            action_pars = {}
+        return CrawlerActionBuilder.build(action_def[CrawlerAction.KEY_ACTION_NAME], **action_pars)
+
     @staticmethod
     def get_supported_actions():
         supported_actions = {}
@@ -455,25 +782,13 @@ class CrawlerActionBuilder:
 
     @staticmethod
     def _build_conditional_action(cond_action: ConditionalAction):
-        test_action_def = cond_action.test_action
-        action_pars = test_action_def.get(CrawlerAction.KEY_ACTION_PARAMETERS, {})
-        cond_action.test_action = CrawlerActionBuilder.build(
-            test_action_def[CrawlerAction.KEY_ACTION_NAME], **action_pars
-        )
+        cond_action.test_action = CrawlerActionBuilder.build_from_definition(cond_action.test_action)
 
         if cond_action.result_action:
-            action_def = cond_action.result_action
-            action_pars = action_def.get(CrawlerAction.KEY_ACTION_PARAMETERS, {})
-            cond_action.result_action = CrawlerActionBuilder.build(
-                action_def[CrawlerAction.KEY_ACTION_NAME], **action_pars
-            )
+            cond_action.result_action = CrawlerActionBuilder.build_from_definition(cond_action.result_action)
 
         if cond_action.fail_action:
-            action_def = cond_action.fail_action
-            action_pars = action_def.get(CrawlerAction.KEY_ACTION_PARAMETERS, {})
-            cond_action.fail_action = CrawlerActionBuilder.build(
-                action_def[CrawlerAction.KEY_ACTION_NAME], **action_pars
-            )
+            cond_action.fail_action = CrawlerActionBuilder.build_from_definition(cond_action.fail_action)
         return cond_action
 
 
@@ -488,17 +803,51 @@ class GenericCrawler:
         docker_mode=True,
         random_wait_range=None,
         page_load_timeout=300,
+        max_tabs=4,
+        profiler: CrawlerProfiler = None,
+        network_recorder: NetworkRecorder = None,
+        driver_backend: DriverBackend = None,
+        network_archive: NetworkArchive = None,
+        adaptive_timeouts: AdaptiveTimeouts = None,
     ):
         self.start_url = start_url
         self.random_wait_range = random_wait_range
         self.download_folder = download_folder
         self.component_interface = component_interface
         self.runid = runid
-
+        self.page_load_timeout = page_load_timeout
+        self.max_tabs = max_tabs
+        self.profiler = profiler
+        self.network_recorder = network_recorder
+        self._driver_backend = driver_backend or LocalDriverBackend()
+        self.network_archive = network_archive
+        self.adaptive_timeouts = adaptive_timeouts
+
+        self._performance_log = PerformanceLog()
+        if self.profiler:
+            self.profiler.register(self._performance_log)
+        if self.network_recorder:
+            self.network_recorder.register(self._performance_log)
+
+        self._fetch_interceptor = None
         self._driver = self._get_driver(resolution, download_folder, docker_mode)
-        self._driver.set_page_load_timeout(page_load_timeout)
-        self._driver.set_script_timeout(page_load_timeout)
         self._main_window_handle = None
+        try:
+            self._setup_driver()
+        except Exception:
+            # the crawler is not returned to the caller, so the session would never be released
+            self.stop()
+            raise
+
+    def _setup_driver(self):
+        self._performance_log.attach(self._driver)
+        if self.profiler:
+            self.profiler.attach(self._driver)
+        if self.network_archive:
+            self._fetch_interceptor = FetchInterceptor(self._driver, self.network_archive)
+            self._fetch_interceptor.start()
+        self._driver.set_page_load_timeout(self.page_load_timeout)
+        self._driver.set_script_timeout(self.page_load_timeout)
         while not self._main_window_handle:
             self._main_window_handle = self._driver.current_window_handle
 
@@ -516,23 +865,72 @@ class GenericCrawler:
             self._driver.add_cookie(cookie)
 
     def stop(self):
-        self._driver.quit()
+        try:
+            self._performance_log.flush()
+            if self._fetch_interceptor:
+                self._fetch_interceptor.stop()
+        finally:
+            self._driver_backend.release_driver(self._driver)
+
+    def profile_step(self, description: str):
+        """
+        Returns context profiling the wrapped step, no-op when profiling is disabled or limited to actions.
+        """
+        if self.profiler and self.profiler.profiles_steps:
+            return self.profiler.profile(description)
+        return nullcontext()
 
-    def perform_action(self, action: CrawlerAction):
+    def perform_action(self, action: CrawlerAction, description: str = None):
         data_folder = self.component_interface.data_folder_path
-        res = action.execute(
+        action_name = type(action).__name__
+        if self.profiler and self.profiler.profiles_action(action_name):
+            profile_context = self.profiler.profile(description or action_name)
+        else:
+            profile_context = nullcontext()
+
+        with profile_context:
+            res = action.execute(
+                self._driver,
+                download_folder=self.download_folder,
+                data_folder=data_folder,
+                component_interface=self.component_interface,
+                runid=self.runid,
+                main_handle=self._main_window_handle,
+                network_recorder=self.network_recorder,
+                network_archive=self.network_archive,
+                adaptive_timeouts=self.adaptive_timeouts,
+            )
+        self._performance_log.flush()
+
+        self._wait_random(self.random_wait_range)
+        return res
+
+    def perform_in_tabs(self, branches: List[tuple[str, List[CrawlerAction]]]) -> list:
+        """
+        Executes the action sequences concurrently, each in a separate tab of the current browser.
+
+        :param branches: List of (description, actions) tuples.
+        :return: Result of the last executed action of each branch.
+        """
+        from webcrawler.async_crawler import MultiTabExecutor
+
+        executor = MultiTabExecutor(
             self._driver,
             download_folder=self.download_folder,
-            data_folder=data_folder,
+            data_folder=self.component_interface.data_folder_path,
             component_interface=self.component_interface,
             runid=self.runid,
-            main_handle=self._main_window_handle,
+            max_tabs=self.max_tabs,
+            random_wait_range=self.random_wait_range,
+            page_load_timeout=self.page_load_timeout,
+            network_archive=self.network_archive,
+            network_recorder=self.network_recorder,
         )
+        results = executor.run(branches)
+        self._performance_log.flush()
+        return results
 
-        self._wait_random(self.random_wait_range)
-        return res
-
-    def _set_window_size(self, driver: webdriver.Chrome, resolution: str):
+    def _set_window_size(self, driver: webdriver.Remote, resolution: str):
         try:
             desired_width, desired_height = [int(n) for n in resolution.split("x")]
         except Exception:
@@ -555,7 +953,7 @@ class GenericCrawler:
         )
         driver.set_window_size(result_width, result_height)
 
-    def _get_driver(self, resolution: str, download_folder: str, docker_mode: bool) -> webdriver.Chrome:
+    def _get_driver(self, resolution: str, download_folder: str, docker_mode: bool) -> webdriver.Remote:
         options = webdriver.ChromeOptions()
         prefs = {
             "download.default_directory": download_folder,
@@ -572,8 +970,14 @@ class GenericCrawler:
             options.add_argument("--disable-dev-shm-usage")  # overcome limited resource problems
             options.add_argument("--headless")
 
-        driver = webdriver.Chrome(options=options)
-        self._set_window_size(driver, resolution)
+        self._performance_log.configure_options(options)
+
+        driver = self._driver_backend.acquire_driver(options)
+        try:
+            self._set_window_size(driver, resolution)
+        except Exception:
+            self._driver_backend.release_driver(driver)
+            raise
         return driver
 
     def _wait_random(self, wait_range: tuple[int, int] | None):
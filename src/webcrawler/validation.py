@@ -0,0 +1,544 @@
+import inspect
+import re
+import typing
+from typing import Dict, List
+
+from nested_lookup import nested_lookup
+from selenium.webdriver.remote.switch_to import SwitchTo
+from selenium.webdriver.remote.webdriver import WebDriver
+from selenium.webdriver.remote.webelement import WebElement
+
+from webcrawler.driver_backends import DriverBackendBuilder, RemoteDriverBackend
+from webcrawler.selenium_crawler import (
+    CrawlerAction,
+    CrawlerActionBuilder,
+    DriverSwitchToAction,
+    GenericDriverAction,
+    GenericElementAction,
+    GenericShadowDomElementAction,
+)
+
+KEY_STEPS = "steps"
+KEY_DESCRIPTION = "description"
+KEY_ACTIONS = "actions"
+KEY_RUN_IN_TAB = "run_in_tab"
+KEY_DRIVER_BACKEND = "driver_backend"
+KEY_DRIVER_BACKEND_TYPE = "type"
+
+
+class XPathSyntaxChecker:
+    """
+    Syntax checker of XPath 1.0 expressions, the version supported by browsers.
+
+    Implements the grammar of https://www.w3.org/TR/1999/REC-xpath-19991116/ including the lexical disambiguation
+    rules, so expressions can be validated without a browser.
+    """
+
+    AXES = [
+        "ancestor",
+        "ancestor-or-self",
+        "attribute",
+        "child",
+        "descendant",
+        "descendant-or-self",
+        "following",
+        "following-sibling",
+        "namespace",
+        "parent",
+        "preceding",
+        "preceding-sibling",
+        "self",
+    ]
+    NODE_TYPES = ["comment", "text", "processing-instruction", "node"]
+    FUNCTIONS = [
+        "last",
+        "position",
+        "count",
+        "id",
+        "local-name",
+        "namespace-uri",
+        "name",
+        "string",
+        "concat",
+        "starts-with",
+        "contains",
+        "substring-before",
+        "substring-after",
+        "substring",
+        "string-length",
+        "normalize-space",
+        "translate",
+        "boolean",
+        "not",
+        "true",
+        "false",
+        "lang",
+        "number",
+        "sum",
+        "floor",
+        "ceiling",
+        "round",
+    ]
+    OPERATOR_NAMES = ["and", "or", "mod", "div"]
+    NON_OPERATOR_PRECEDING = ["@", "::", "(", "[", ",", "$", "/", "//", "|", "+", "-", "=", "!=", "<", "<=", ">", ">="]
+
+    _NCNAME = r"[^\W\d][\w.\-]*"
+    _TOKEN_RE = re.compile(
+        r"\s*(?:"
+        r"(?P<literal>\"[^\"]*\"|'[^']*')"
+        r"|(?P<number>\d+(?:\.\d*)?|\.\d+)"
+        r"|(?P<punct>\.\.|::|//|!=|<=|>=|[()\[\].@,/|+\-=<>*$])"
+        rf"|(?P<name>{_NCNAME}(?::(?:{_NCNAME}|\*))?)"
+        r")"
+    )
+
+    def __init__(self, expression: str):
+        self.expression = expression
+        self._tokens = self._tokenize(expression)
+        self._position = 0
+
+    @classmethod
+    def check(cls, expression: str):
+        """
+        Raises ValueError describing the first syntax error of the expression.
+        """
+        if not isinstance(expression, str) or not expression.strip():
+            raise ValueError("XPath expression must be a non-empty string.")
+        checker = cls(expression)
+        checker._parse_expr()
+        if checker._peek() is not None:
+            checker._fail(f"unexpected '{checker._peek()[1]}'")
+
+    # tokenizer
+
+    def _tokenize(self, expression: str) -> List[tuple]:
+        tokens = []
+        position = 0
+        expression = expression.rstrip()
+        while position < len(expression):
+            match = self._TOKEN_RE.match(expression, position)
+            if not match or match.end() == position:
+                raise ValueError(f"Invalid XPath '{expression}': unexpected character at position {position}.")
+            kind = match.lastgroup
+            value = match.group(kind)
+            if kind == "name" or value == "*":
+                if self._is_operator_context(tokens):
+                    if kind == "name" and value not in self.OPERATOR_NAMES:
+                        raise ValueError(f"Invalid XPath '{expression}': expected operator but found '{value}'.")
+                    kind = "operator"
+                else:
+                    kind = "name"
+            tokens.append((kind, value))
+            position = match.end()
+        return tokens
+
+    def _is_operator_context(self, preceding: List[tuple]) -> bool:
+        # a name or '*' is an operator if preceded by a token that is not '@', '::', '(', '[', ',' or an operator
+        if not preceding:
+            return False
+        kind, value = preceding[-1]
+        return kind != "operator" and not (kind == "punct" and value in self.NON_OPERATOR_PRECEDING)
+
+    # parser
+
+    def _peek(self, offset=0):
+        index = self._position + offset
+        return self._tokens[index] if index < len(self._tokens) else None
+
+    def _next(self):
+        token = self._peek()
+        if token is None:
+            self._fail("unexpected end of expression")
+        self._position += 1
+        return token
+
+    def _accept(self, *values) -> bool:
+        token = self._peek()
+        if token is not None and token[0] in ("punct", "operator") and token[1] in values:
+            self._position += 1
+            return True
+        return False
+
+    def _expect(self, value: str):
+        if not self._accept(value):
+            token = self._peek()
+            self._fail(f"expected '{value}' but found '{token[1]}'" if token else f"missing '{value}'")
+
+    def _fail(self, message: str):
+        raise ValueError(f"Invalid XPath '{self.expression}': {message}.")
+
+    def _parse_expr(self):
+        self._parse_binary(["or", "and", ("=", "!="), ("<", "<=", ">", ">="), ("+", "-"), ("*", "div", "mod")])
+
+    def _parse_binary(self, levels: list):
+        if not levels:
+            return self._parse_unary()
+        operators = levels[0] if isinstance(levels[0], tuple) else (levels[0],)
+        self._parse_binary(levels[1:])
+        while self._accept(*operators):
+            self._parse_binary(levels[1:])
+
+    def _parse_unary(self):
+        while self._accept("-"):
+            pass
+        self._parse_path()
+        while self._accept("|"):
+            self._parse_path()
+
+    def _parse_path(self):
+        token = self._peek()
+        if token is None:
+            self._fail("unexpected end of expression")
+        kind, value = token
+        if kind == "punct" and value in ("/", "//"):
+            self._next()
+            if value == "//" or self._starts_step():
+                self._parse_relative_path()
+        elif self._starts_step():
+            self._parse_relative_path()
+        else:
+            self._parse_primary()
+            self._parse_predicates()
+            if self._accept("/", "//"):
+                self._parse_relative_path()
+
+    def _starts_step(self) -> bool:
+        token = self._peek()
+        if token is None:
+            return False
+        kind, value = token
+        if kind == "punct":
+            return value in (".", "..", "@")
+        if kind != "name":
+            return False
+        following = self._peek(1)
+        if following == ("punct", "("):
+            return value in self.NODE_TYPES
+        return True
+
+    def _parse_relative_path(self):
+        self._parse_step()
+        while self._accept("/", "//"):
+            self._parse_step()
+
+    def _parse_step(self):
+        if self._accept(".", ".."):
+            return
+        if not self._accept("@"):
+            kind, value = self._peek() or (None, None)
+            if kind == "name" and self._peek(1) == ("punct", "::"):
+                if value not in self.AXES:
+                    self._fail(f"unknown axis '{value}'")
+                self._position += 2
+        self._parse_node_test()
+        self._parse_predicates()
+
+    def _parse_node_test(self):
+        kind, value = self._next()
+        if kind != "name":
+            self._fail(f"expected node test but found '{value}'")
+        if self._peek() == ("punct", "("):
+            if value not in self.NODE_TYPES:
+                self._fail(f"unknown node type '{value}'")
+            self._next()
+            if value == "processing-instruction" and self._peek() and self._peek()[0] == "literal":
+                self._next()
+            self._expect(")")
+
+    def _parse_predicates(self):
+        while self._accept("["):
+            self._parse_expr()
+            self._expect("]")
+
+    def _parse_primary(self):
+        kind, value = self._next()
+        if kind in ("literal", "number"):
+            return
+        if kind == "punct" and value == "$":
+            if self._next()[0] != "name":
+                self._fail("invalid variable reference")
+        elif kind == "punct" and value == "(":
+            self._parse_expr()
+            self._expect(")")
+        elif kind == "name" and self._peek() == ("punct", "("):
+            if value not in self.FUNCTIONS:
+                self._fail(f"unknown function '{value}()'")
+            self._next()
+            if not self._accept(")"):
+                self._parse_expr()
+                while self._accept(","):
+                    self._parse_expr()
+                self._expect(")")
+        else:
+            self._fail(f"unexpected '{value}'")
+
+
+class ActionSchema:
+    """
+    Parameter schema of a CrawlerAction derived from the signature of its constructor.
+    """
+
+    # untyped parameters are checked against the type of their default value
+    NUMERIC = (int, float)
+
+    def __init__(self, action_class: type):
+        self.action_class = action_class
+        self.parameters = {}
+        self.accepts_any = False
+        self.aliases = getattr(action_class, "PARAMETER_ALIASES", {})
+
+        if action_class.__init__ is object.__init__:
+            return
+        hints = typing.get_type_hints(action_class.__init__)
+        for name, par in list(inspect.signature(action_class.__init__).parameters.items())[1:]:
+            if par.kind == par.VAR_KEYWORD:
+                self.accepts_any = True
+            elif par.kind != par.VAR_POSITIONAL:
+                required = par.default is par.empty
+                self.parameters[name] = (required, self._expected_type(hints.get(name), par.default))
+
+    @property
+    def required_parameters(self) -> List[str]:
+        return [name for name, (required, _) in self.parameters.items() if required]
+
+    def validate(self, parameters: dict) -> List[str]:
+        errors = []
+        parameters = {self.aliases.get(k, k): v for k, v in parameters.items()}
+        for name in self.required_parameters:
+            if name not in parameters:
+                errors.append(f"missing required parameter '{name}'")
+
+        for name, value in parameters.items():
+            if name not in self.parameters:
+                if not self.accepts_any:
+                    errors.append(f"unknown parameter '{name}', supported parameters are {list(self.parameters)}")
+                continue
+            expected_type = self.parameters[name][1]
+            # user parameter references are resolved at runtime, their type is not known upfront
+            is_reference = isinstance(value, dict) and "attr" in value
+            if expected_type and value is not None and not is_reference and not self._is_instance(value, expected_type):
+                errors.append(
+                    f"parameter '{name}' must be of type {self._type_name(expected_type)}, "
+                    f"got {type(value).__name__} ({value!r})"
+                )
+        return errors
+
+    @staticmethod
+    def _expected_type(annotation, default):
+        if annotation is not None:
+            origin = typing.get_origin(annotation)
+            if origin is not None:
+                return origin if isinstance(origin, type) else None
+            return annotation if isinstance(annotation, type) else None
+        if default is inspect.Parameter.empty or default is None:
+            return None
+        if isinstance(default, bool):
+            return bool
+        if isinstance(default, ActionSchema.NUMERIC):
+            return ActionSchema.NUMERIC
+        return type(default)
+
+    @staticmethod
+    def _is_instance(value, expected_type) -> bool:
+        if expected_type in (ActionSchema.NUMERIC, int, float):
+            return isinstance(value, ActionSchema.NUMERIC) and not isinstance(value, bool)
+        return isinstance(value, expected_type)
+
+    @staticmethod
+    def _type_name(expected_type) -> str:
+        if expected_type is ActionSchema.NUMERIC:
+            return "number"
+        return expected_type.__name__
+
+
+class ConfigValidator:
+    """
+    Validates the crawler configuration before any browser is launched and reports all errors at once.
+    """
+
+    # parameters holding XPath expressions
+    XPATH_PARAMETER_RE = re.compile(r"^(.+_)?xpath$")
+    TAG_NAME_RE = re.compile(r"^[A-Za-z][\w\-]*$")
+    RESOLUTION_RE = re.compile(r"^\d+x\d+$")
+    # allowed method names of the generic actions, checked against the Selenium interfaces
+    GENERIC_METHOD_TARGETS = {
+        GenericElementAction: WebElement,
+        GenericShadowDomElementAction: WebElement,
+        GenericDriverAction: WebDriver,
+        DriverSwitchToAction: SwitchTo,
+    }
+
+    def __init__(
+        self,
+        supported_functions: List[str] = None,
+        tab_actions: List[str] = None,
+        tab_methods: Dict[str, List[str]] = None,
+    ):
+        """
+
+        :param supported_functions: Names of the user functions supported in the user parameters.
+        :param tab_actions: Names of the actions supported in steps running in tabs.
+        :param tab_methods: Method names supported in steps running in tabs, keyed by the generic action name.
+        """
+        self.supported_functions = supported_functions
+        self.tab_actions = tab_actions
+        self.tab_methods = tab_methods or {}
+        self.supported_actions = CrawlerActionBuilder.get_supported_actions()
+        self._schemas = {name: ActionSchema(c) for name, c in self.supported_actions.items()}
+
+    def validate_parameters(self, parameters: dict) -> List[str]:
+        """
+        Validates the top level parameters, the user parameter references and all steps.
+        """
+        errors = []
+        resolution = parameters.get("resolution")
+        if resolution and not (isinstance(resolution, str) and self.RESOLUTION_RE.match(resolution)):
+            errors.append(f"Invalid resolution value: {resolution}. Please provide WIDTHxHEIGHT (e.g. 2560x1440)")
+
+        wait_range = parameters.get("random_wait_range")
+        if wait_range is not None and not (
+            isinstance(wait_range, list)
+            and len(wait_range) == 2
+            and all(isinstance(w, int) and not isinstance(w, bool) for w in wait_range)
+            and wait_range[0] <= wait_range[1]
+        ):
+            errors.append(f"random_wait_range must be a [min, max] list of integers, got {wait_range}")
+
+        start_url = parameters.get("start_url")
+        if not isinstance(start_url, str) or not re.match(r"^https?://", start_url):
+            errors.append(f"start_url must be a http(s) URL, got {start_url!r}")
+
+        steps = parameters.get(KEY_STEPS)
+        if not isinstance(steps, list):
+            return errors + ["steps must be a list of step objects"]
+
+        user_parameters = parameters.get("user_parameters") or {}
+        errors.extend(self.validate_user_parameters(steps, user_parameters))
+        errors.extend(self.validate_steps(steps))
+        driver_backend = parameters.get(KEY_DRIVER_BACKEND) or {}
+        if driver_backend.get(KEY_DRIVER_BACKEND_TYPE) == DriverBackendBuilder.BACKEND_REMOTE:
+            errors.extend(self.validate_remote_driver_steps(steps))
+        return errors
+
+    def validate_remote_driver_steps(self, steps: list) -> List[str]:
+        """
+        Reports the actions, including the nested ones, that cannot run in a browser on a remote node.
+        """
+        errors = []
+        for step_index, step in enumerate(steps):
+            if not isinstance(step, dict):
+                continue
+            action_names = set(str(a) for a in nested_lookup(CrawlerAction.KEY_ACTION_NAME, step.get(KEY_ACTIONS)))
+            for action_name in sorted(action_names.intersection(RemoteDriverBackend.UNSUPPORTED_ACTIONS)):
+                errors.append(
+                    f"Step {step_index} '{step.get(KEY_DESCRIPTION, '')}': {action_name} is not supported with "
+                    f"the 'remote' driver backend, the files are downloaded on the remote node."
+                )
+        return errors
+
+    def validate_user_parameters(self, steps: list, user_parameters: dict) -> List[str]:
+        errors = []
+        for key in sorted(set(str(a) for a in nested_lookup("attr", steps))):
+            if key not in user_parameters:
+                errors.append(f"User parameter '{key}' referenced in steps is not present in 'user_parameters'.")
+
+        for key, value in user_parameters.items():
+            if isinstance(value, dict):
+                errors.extend(self._validate_function(key, value))
+        return errors
+
+    def validate_steps(self, steps: list) -> List[str]:
+        errors = []
+        for step_index, step in enumerate(steps):
+            location = f"Step {step_index} '{step.get(KEY_DESCRIPTION, '')}'" if isinstance(step, dict) else ""
+            actions = step.get(KEY_ACTIONS) if isinstance(step, dict) else None
+            if not isinstance(actions, list):
+                errors.append(f"Step {step_index}: 'actions' must be a list of action objects.")
+                continue
+            for action_index, action_def in enumerate(actions):
+                action_location = f"{location}, action {action_index}"
+                errors.extend(self.validate_action(action_def, action_location))
+                if step.get(KEY_RUN_IN_TAB) and self.tab_actions is not None and isinstance(action_def, dict):
+                    errors.extend(self._validate_tab_action(action_def, action_location))
+        return errors
+
+    def validate_action(self, action_def, location: str) -> List[str]:
+        if not isinstance(action_def, dict) or not action_def.get(CrawlerAction.KEY_ACTION_NAME):
+            return [f"{location}: action must be an object with 'action_name'."]
+
+        action_name = action_def[CrawlerAction.KEY_ACTION_NAME]
+        location = f"{location} ({action_name})"
+        if action_name not in self._schemas:
+            return [f"{location}: unsupported action, supported values are {sorted(self._schemas)}"]
+
+        parameters = action_def.get(CrawlerAction.KEY_ACTION_PARAMETERS) or {}
+        if not isinstance(parameters, dict):
+            return [f"{location}: 'action_parameters' must be an object."]
+
+        action_class = self.supported_actions[action_name]
+        errors = [f"{location}: {e}" for e in self._schemas[action_name].validate(parameters)]
+        for name, value in parameters.items():
+            if self.XPATH_PARAMETER_RE.match(name) and isinstance(value, str):
+                try:
+                    XPathSyntaxChecker.check(value)
+                except ValueError as e:
+                    errors.append(f"{location}: parameter '{name}': {e}")
+
+        if "shadow_parent_element" in parameters and not self.TAG_NAME_RE.match(
+            str(parameters["shadow_parent_element"])
+        ):
+            errors.append(f"{location}: 'shadow_parent_element' must be a valid tag name.")
+
+        method_target = self.GENERIC_METHOD_TARGETS.get(action_class)
+        method_name = parameters.get("method_name")
+        if method_target and isinstance(method_name, str) and not callable(getattr(method_target, method_name, None)):
+            errors.append(f"{location}: '{method_name}' is not a method of {method_target.__name__}.")
+
+        if hasattr(action_class, "check_parameters"):
+            errors.extend(f"{location}: {e}" for e in action_class.check_parameters(parameters))
+
+        for nested_name in getattr(action_class, "NESTED_ACTION_PARAMETERS", []):
+            if parameters.get(nested_name) is not None:
+                errors.extend(self.validate_action(parameters[nested_name], f"{location}.{nested_name}"))
+        for nested_name in getattr(action_class, "NESTED_ACTION_LIST_PARAMETERS", []):
+            if isinstance(parameters.get(nested_name), list):
+                for index, nested_def in enumerate(parameters[nested_name]):
+                    errors.extend(self.validate_action(nested_def, f"{location}.{nested_name}[{index}]"))
+        return errors
+
+    def _validate_tab_action(self, action_def: dict, location: str) -> List[str]:
+        action_name = action_def.get(CrawlerAction.KEY_ACTION_NAME)
+        if action_name not in self.tab_actions:
+            return [f"{location}: {action_name} is not supported in steps running in tabs."]
+
+        errors = []
+        parameters = action_def.get(CrawlerAction.KEY_ACTION_PARAMETERS) or {}
+        if not isinstance(parameters, dict):
+            return errors
+        method_name = parameters.get("method_name")
+        supported_methods = self.tab_methods.get(action_name)
+        if supported_methods is not None and isinstance(method_name, str) and method_name not in supported_methods:
+            errors.append(
+                f"{location}: method '{method_name}' of {action_name} is not supported in steps running in tabs, "
+                f"supported methods are {supported_methods}"
+            )
+        action_class = self.supported_actions.get(action_name)
+        for nested_name in getattr(action_class, "NESTED_ACTION_PARAMETERS", []):
+            if isinstance(parameters.get(nested_name), dict):
+                errors.extend(self._validate_tab_action(parameters[nested_name], f"{location}.{nested_name}"))
+        return errors
+
+    def _validate_function(self, key: str, function_cfg: dict) -> List[str]:
+        function_name = function_cfg.get("function")
+        if not function_name:
+            return [f"The user parameter {key} value is object and is not a valid function object: {function_cfg}"]
+        errors = []
+        if self.supported_functions is not None and function_name not in self.supported_functions:
+            errors.append(
+                f"Specified user function [{function_name}] in parameter {key} is not supported! "
+                f"Supported functions are {self.supported_functions}"
+            )
+        for arg in function_cfg.get("args") or []:
+            if isinstance(arg, dict):
+                errors.extend(self._validate_function(key, arg))
+        return errors
@@ -0,0 +1,49 @@
+import asyncio
+import unittest
+
+import mock
+
+from webcrawler.async_crawler import (
+    AsyncConditionalAction,
+    AsyncCrawlerActionBuilder,
+    AsyncDownloadPageContent,
+    AsyncWaitForElement,
+)
+from webcrawler.selenium_crawler import CrawlerActionBuilder
+
+
+class TestAsyncCrawlerActionBuilder(unittest.TestCase):
+    def test_conditional_action_converted_with_nested_actions(self):
+        action = CrawlerActionBuilder.build(
+            "ConditionalAction",
+            test_action={"action_name": "WaitForElement", "action_parameters": {"xpath": "//a", "delay": 5}},
+            result_action={"action_name": "BreakBlockExecution"},
+        )
+        async_action = AsyncCrawlerActionBuilder.from_action(action)
+
+        self.assertIsInstance(async_action, AsyncConditionalAction)
+        self.assertIsInstance(async_action.test_action, AsyncWaitForElement)
+        self.assertEqual(async_action.test_action.delay, 5)
+
+    def test_unsupported_action_fails(self):
+        with self.assertRaises(ValueError):
+            AsyncCrawlerActionBuilder.from_action(CrawlerActionBuilder.build("SwitchToPopup"))
+
+
+class TestAsyncDownloadPageContent(unittest.TestCase):
+    def test_download_recorded_in_network_log(self):
+        tab = mock.Mock()
+        tab.get_cookies = mock.AsyncMock(return_value=[])
+        response = mock.Mock()
+        network_recorder = mock.Mock()
+        action = AsyncDownloadPageContent("report.csv", url="https://example.com/report.csv")
+
+        with mock.patch.object(action, "_download", return_value=(response, 10, 0.5)) as download:
+            asyncio.run(action.execute_async(tab, download_folder="out", network_recorder=network_recorder))
+
+        download.assert_called_once_with("https://example.com/report.csv", [], "out/report.csv", None)
+        network_recorder.record_http_response.assert_called_once_with(response, 10, 0.5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,4 +1,5 @@
 import os
+import tempfile
 import unittest
 
 import mock
@@ -17,6 +18,41 @@ class TestComponent(unittest.TestCase):
             comp = Component()
             comp.run()
 
+    def test_group_steps_in_tabs(self):
+        steps = [{"description": "login"}, {"run_in_tab": True}, {"run_in_tab": True}, {}, {"run_in_tab": True}]
+        groups = Component._group_steps(steps)
+
+        group_sizes = [(in_tabs, len(group)) for in_tabs, group in groups]
+        self.assertEqual(group_sizes, [(False, 1), (True, 2), (False, 1), (True, 1)])
+
+    def test_release_resources_after_failed_setup(self):
+        comp = Component.__new__(Component)
+        comp.web_crawler = mock.Mock()
+        comp.web_crawler.stop.side_effect = RuntimeError("browser crashed")
+        comp.network_recorder = mock.Mock()
+        comp.network_archive = mock.Mock()
+        comp._network_archive_file = None
+        comp.profiler = None
+
+        with self.assertRaises(RuntimeError):
+            comp._release_resources()
+
+        comp.network_recorder.close.assert_called_once()
+        comp.network_archive.close.assert_called_once()
+
+    def test_latest_input_file_by_file_id(self):
+        comp = Component.__new__(Component)
+        with tempfile.TemporaryDirectory() as files_in_path:
+            for name in ["998_network_archive.zip", "1002_network_archive.zip", "1001_other_network_archive.zip"]:
+                open(os.path.join(files_in_path, name), "w").close()
+            with mock.patch.object(Component, "files_in_path", new_callable=mock.PropertyMock) as files_in:
+                files_in.return_value = files_in_path
+                latest = comp._get_latest_input_file("network_archive.zip")
+                missing = comp._get_latest_input_file("missing.zip")
+
+        self.assertEqual(os.path.basename(latest), "1002_network_archive.zip")
+        self.assertIsNone(missing)
+
 
 if __name__ == "__main__":
     # import sys;sys.argv = ['', 'Test.testName']
@@ -0,0 +1,33 @@
+import unittest
+
+import mock
+from selenium import webdriver
+
+from webcrawler.driver_backends import DriverBackend, DriverBackendBuilder, LocalDriverBackend, RemoteDriverBackend
+
+
+class StubDriverBackend(DriverBackend):
+    def _create_driver(self, options):
+        return mock.Mock(session_id="session")
+
+
+class TestDriverBackends(unittest.TestCase):
+    def test_session_is_quit_on_release(self):
+        backend = StubDriverBackend()
+        driver = backend.acquire_driver(webdriver.ChromeOptions())
+        backend.release_driver(driver)
+
+        driver.quit.assert_called_once()
+
+    def test_build_backend(self):
+        self.assertIsInstance(DriverBackendBuilder.build(None), LocalDriverBackend)
+        backend = DriverBackendBuilder.build("remote", remote_url="http://localhost:4444")
+        self.assertIsInstance(backend, RemoteDriverBackend)
+        with self.assertRaises(ValueError):
+            DriverBackendBuilder.build("remote")
+        with self.assertRaises(ValueError):
+            DriverBackendBuilder.build("service")
+
+
+if __name__ == "__main__":
+    unittest.main()
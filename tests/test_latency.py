@@ -0,0 +1,39 @@
+import unittest
+
+from webcrawler.latency import AdaptiveTimeouts, LatencyHistory
+
+
+class TestLatencyHistory(unittest.TestCase):
+    def test_percentiles(self):
+        history = LatencyHistory({"WaitForElement //table": [float(i) for i in range(1, 101)]}, history_size=100)
+
+        self.assertEqual(history.percentile("WaitForElement //table", 50), 50.0)
+        self.assertEqual(history.percentile("WaitForElement //table", 99), 99.0)
+        self.assertIsNone(history.percentile("missing", 99))
+
+    def test_history_bounded(self):
+        history = LatencyHistory({"a": [1.0, 2.0, 3.0]}, history_size=2, max_keys=2)
+        history.add("b", 1)
+        history.add("c", 1)
+        history.add("a", 4)
+
+        self.assertEqual(history.to_state(), {"c": [1.0], "a": [3.0, 4.0]})
+
+
+class TestAdaptiveTimeouts(unittest.TestCase):
+    def test_configured_timeout_until_enough_samples(self):
+        timeouts = AdaptiveTimeouts(LatencyHistory({"key": [1.0, 1.0]}), min_samples=3)
+        self.assertEqual(timeouts.timeout("key", 30), 30)
+
+        timeouts.add("key", 2.0)
+        self.assertEqual(timeouts.timeout("key", 30), 6.0)
+
+    def test_timeout_bounds(self):
+        timeouts = AdaptiveTimeouts(LatencyHistory({"fast": [0.1] * 5, "slow": [20.0] * 5}), margin=2, min_timeout=5)
+
+        self.assertEqual(timeouts.timeout("fast", 30), 5)
+        self.assertEqual(timeouts.timeout("slow", 30), 30)
+
+
+if __name__ == "__main__":
+    unittest.main()
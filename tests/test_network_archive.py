@@ -0,0 +1,113 @@
+import asyncio
+import gzip
+import os
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import mock
+import requests
+
+from webcrawler.cdp import CdpError
+from webcrawler.network_archive import ArchiveHTTPAdapter, FetchInterceptor, NetworkArchive
+
+
+class LargeReportHandler(BaseHTTPRequestHandler):
+    body = b"".join(b"%i,value\n" % i for i in range(50000))
+
+    def do_GET(self):
+        content = gzip.compress(self.body)
+        self.send_response(200)
+        self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestNetworkArchive(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.archive_path = os.path.join(self.temp_dir.name, "archive.zip")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def _record(self, *responses):
+        archive = NetworkArchive(self.archive_path, NetworkArchive.MODE_RECORD)
+        key = NetworkArchive.request_key("GET", "https://example.com/report.csv")
+        for body in responses:
+            archive.add(key, 200, [{"name": "Content-Type", "value": "text/csv"}], body)
+        archive.close()
+
+    def _replay_session(self, allow_live_requests=False):
+        archive = NetworkArchive(self.archive_path, NetworkArchive.MODE_REPLAY, allow_live_requests)
+        session = requests.Session()
+        session.mount("http://", ArchiveHTTPAdapter(archive))
+        session.mount("https://", ArchiveHTTPAdapter(archive))
+        return session
+
+    def test_responses_replayed_in_recorded_order(self):
+        self._record(b"a,b\n1,2", b"a,b\n3,4")
+        session = self._replay_session()
+
+        self.assertEqual(session.get("https://example.com/report.csv").content, b"a,b\n1,2")
+        response = session.get("https://example.com/report.csv", stream=True)
+        self.assertEqual(b"".join(response.iter_content(2)), b"a,b\n3,4")
+        self.assertEqual(response.headers["Content-Type"], "text/csv")
+        # last response is repeated
+        self.assertEqual(session.get("https://example.com/report.csv").content, b"a,b\n3,4")
+
+    def test_streamed_download_recorded_and_replayed(self):
+        server = ThreadingHTTPServer(("127.0.0.1", 0), LargeReportHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f"http://127.0.0.1:{server.server_port}/report.csv"
+        try:
+            archive = NetworkArchive(self.archive_path, NetworkArchive.MODE_RECORD)
+            session = requests.Session()
+            session.mount("http://", ArchiveHTTPAdapter(archive))
+            recorded = b"".join(session.get(url, stream=True).iter_content(8192))
+            archive.close()
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        replayed = b"".join(self._replay_session().get(url, stream=True).iter_content(8192))
+        self.assertEqual(recorded, LargeReportHandler.body)
+        self.assertEqual(replayed, LargeReportHandler.body)
+
+    def test_missing_request_fails_in_replay(self):
+        self._record(b"")
+        with self.assertRaises(requests.ConnectionError):
+            self._replay_session().get("https://example.com/other")
+
+    def test_post_data_is_part_of_key(self):
+        self.assertNotEqual(
+            NetworkArchive.request_key("POST", "https://example.com", "a=1"),
+            NetworkArchive.request_key("POST", "https://example.com", "a=2"),
+        )
+
+
+class TestFetchInterceptor(unittest.TestCase):
+    def test_unavailable_body_not_recorded(self):
+        archive = mock.Mock(is_recording=True)
+        interceptor = FetchInterceptor(mock.Mock(), archive)
+
+        async def send(method, params=None, session_id=None):
+            if method == "Fetch.getResponseBody":
+                raise CdpError("No resource with given identifier found")
+            return {}
+
+        interceptor._connection = mock.Mock(send=mock.AsyncMock(side_effect=send))
+        params = {"requestId": "1", "responseStatusCode": 200, "responseHeaders": []}
+        asyncio.run(interceptor._record(params, "GET https://example.com/", "session"))
+
+        archive.add.assert_not_called()
+        interceptor._connection.send.assert_called_with("Fetch.continueRequest", {"requestId": "1"}, "session")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,130 @@
+import json
+import os
+import tempfile
+import unittest
+
+import mock
+import requests
+
+from webcrawler.network_recorder import NetworkRecorder, NetworkSummary
+
+
+class TestNetworkRecorder(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.har_path = os.path.join(self.temp_dir.name, "network.har")
+        out_file = mock.Mock(full_path=self.har_path)
+        out_file.name = "network.har"
+        self.component = mock.Mock()
+        self.component.create_out_file_definition.return_value = out_file
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_summary_keeps_slowest_requests(self):
+        summary = NetworkSummary(slowest_count=2)
+        summary.add("https://a.com/1", 10, 100)
+        summary.add("https://a.com/2", 30, 200)
+        summary.add("https://b.com/3", 20, 50, failed=True)
+
+        result = summary.to_dict()
+        self.assertEqual(result["total_bytes"], 350)
+        self.assertEqual(result["failed_requests"], 1)
+        self.assertEqual(result["bytes_per_domain"], {"a.com": 300, "b.com": 50})
+        self.assertEqual([r["url"] for r in result["slowest_requests"]], ["https://a.com/2", "https://b.com/3"])
+
+    def test_browser_messages_written_to_har(self):
+        recorder = NetworkRecorder(self.component)
+        recorder._process_messages(
+            [
+                {
+                    "method": "Network.requestWillBeSent",
+                    "params": {
+                        "requestId": "1",
+                        "timestamp": 100.0,
+                        "wallTime": 1600000000.0,
+                        "request": {"url": "https://example.com/?a=b", "method": "GET", "headers": {}},
+                    },
+                },
+                {
+                    "method": "Network.responseReceived",
+                    "params": {"requestId": "1", "response": {"status": 200, "headers": {}, "mimeType": "text/html"}},
+                },
+                {"method": "Network.dataReceived", "params": {"requestId": "1", "dataLength": 500}},
+                {
+                    "method": "Network.loadingFinished",
+                    "params": {"requestId": "1", "timestamp": 100.5, "encodedDataLength": 300},
+                },
+                {
+                    "method": "Network.requestWillBeSent",
+                    "params": {
+                        "requestId": "2",
+                        "timestamp": 100.1,
+                        "request": {"url": "https://cdn.example.com/app.js", "method": "GET"},
+                    },
+                },
+            ]
+        )
+        recorder.close()
+
+        with open(self.har_path) as har_file:
+            har = json.load(har_file)
+        entries = har["log"]["entries"]
+        self.assertEqual(len(entries), 2)
+        self.assertEqual(entries[0]["time"], 500)
+        self.assertEqual(entries[0]["response"]["content"]["size"], 500)
+        self.assertEqual(entries[0]["request"]["queryString"], [{"name": "a", "value": "b"}])
+        self.assertIn("_error", entries[1])
+        self.assertEqual(har["log"]["_summary"]["total_bytes"], 300)
+        self.component.write_manifest.assert_called_once()
+
+    def test_credential_headers_redacted(self):
+        session = requests.Session()
+        session.cookies.set("session", "secret-cookie")
+        request = session.prepare_request(
+            requests.Request("GET", "https://example.com/export.csv", headers={"Authorization": "Bearer secret"})
+        )
+        response = requests.Response()
+        response.request = request
+        response.url = request.url
+        response.status_code = 200
+        response.headers.update({"Set-Cookie": "session=secret-cookie", "Content-Type": "text/csv"})
+
+        recorder = NetworkRecorder(self.component)
+        recorder.record_http_response(response, content_size=10, elapsed=0.1)
+        recorder._process_messages(
+            [
+                {
+                    "method": "Network.requestWillBeSent",
+                    "params": {
+                        "requestId": "1",
+                        "timestamp": 100.0,
+                        "request": {"url": "https://example.com/", "method": "GET", "headers": {"Cookie": "a=b"}},
+                    },
+                },
+                {
+                    "method": "Network.responseReceived",
+                    "params": {"requestId": "1", "response": {"status": 200, "headers": {"set-cookie": "a=c"}}},
+                },
+                {"method": "Network.loadingFinished", "params": {"requestId": "1", "timestamp": 100.5}},
+            ]
+        )
+        recorder.close()
+
+        with open(self.har_path) as har_file:
+            har_content = har_file.read()
+        self.assertNotIn("secret", har_content)
+        entries = json.loads(har_content)["log"]["entries"]
+        request_headers = {h["name"]: h["value"] for h in entries[0]["request"]["headers"]}
+        self.assertEqual(request_headers["Cookie"], NetworkRecorder.REDACTED_VALUE)
+        self.assertEqual(request_headers["Authorization"], NetworkRecorder.REDACTED_VALUE)
+        response_headers = {h["name"]: h["value"] for h in entries[0]["response"]["headers"]}
+        self.assertEqual(response_headers["Content-Type"], "text/csv")
+        self.assertEqual(
+            entries[1]["request"]["headers"], [{"name": "Cookie", "value": NetworkRecorder.REDACTED_VALUE}]
+        )
+        self.assertNotIn("a=c", har_content)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+import gzip
+import json
+import os
+import tempfile
+import unittest
+from contextlib import nullcontext
+
+import mock
+from selenium.common.exceptions import WebDriverException
+
+from webcrawler.performance_log import PerformanceLog
+from webcrawler.profiling import CrawlerProfiler
+from webcrawler.selenium_crawler import GenericCrawler
+
+
+def trace_entry(name):
+    message = {"message": {"method": "Tracing.dataCollected", "params": {"name": name}}}
+    return {"message": json.dumps(message)}
+
+
+class TestCrawlerProfiler(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.component = mock.Mock()
+        self.component.create_out_file_definition.side_effect = lambda name, tags: mock.Mock(
+            full_path=os.path.join(self.temp_dir.name, name), tags=tags
+        )
+        self.driver = mock.Mock()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def _build_profiler(self, **kwargs):
+        profiler = CrawlerProfiler(self.component, runid="123", **kwargs)
+        performance_log = PerformanceLog()
+        profiler.register(performance_log)
+        performance_log.attach(self.driver)
+        profiler.attach(self.driver)
+        return profiler
+
+    def _profile_step(self, profiler):
+        crawler = GenericCrawler.__new__(GenericCrawler)
+        crawler.profiler = profiler
+        return crawler.profile_step("Login")
+
+    def test_disabled_or_action_limited_profiling_returns_nullcontext(self):
+        self.assertIsInstance(self._profile_step(None), nullcontext)
+        self.assertIsInstance(self._profile_step(self._build_profiler(actions=["WaitForElement"])), nullcontext)
+
+    def test_trace_contains_only_events_collected_inside_block(self):
+        profiler = self._build_profiler()
+        self.driver.get_log.side_effect = [[trace_entry("before")], [trace_entry("inside")]]
+
+        with self._profile_step(profiler):
+            pass
+
+        out_file = self.component.write_manifest.call_args[0][0]
+        self.assertTrue(out_file.full_path.endswith("123_001_Login.trace.json.gz"))
+        self.assertIn("Login", out_file.tags)
+        with gzip.open(out_file.full_path, "rt") as trace_file:
+            trace = json.load(trace_file)
+        self.assertEqual(trace["traceEvents"], [{"name": "inside"}])
+        self.assertEqual(trace["metadata"]["label"], "Login")
+
+    def test_failed_collection_does_not_mask_original_exception(self):
+        profiler = self._build_profiler(mode=CrawlerProfiler.MODE_PROFILER)
+
+        def execute_cdp_cmd(cmd, params):
+            if cmd == "Profiler.stop":
+                raise WebDriverException("browser crashed")
+            return {}
+
+        self.driver.execute_cdp_cmd.side_effect = execute_cdp_cmd
+        with self.assertRaises(ValueError):
+            with self._profile_step(profiler):
+                raise ValueError("step failed")
+        self.component.write_manifest.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,237 @@
+import os
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import mock
+from keboola.component import UserException
+from selenium.common.exceptions import StaleElementReferenceException, TimeoutException
+
+from webcrawler.latency import AdaptiveTimeouts, LatencyHistory
+from webcrawler.selenium_crawler import (
+    BreakBlockExecution,
+    ConditionalAction,
+    CrawlerActionBuilder,
+    ExitAction,
+    FollowPagination,
+    WaitForElement,
+)
+
+
+class PagedListingHandler(BaseHTTPRequestHandler):
+    pages = {1: b"id\n1\n2\n", 2: b"id\n3\n", 3: b"id\n3\n"}
+
+    def do_GET(self):
+        page = int(parse_qs(urlparse(self.path).query)["page"][0])
+        body = self.pages.get(page)
+        self.send_response(200 if body else 404)
+        self.end_headers()
+        self.wfile.write(body or b"")
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubDriver:
+    def __init__(self, current_url):
+        self.current_url = current_url
+        self.visited = [current_url]
+        self.scripts = []
+
+    def get(self, url):
+        self.current_url = url
+        self.visited.append(url)
+
+    def get_cookies(self):
+        return [{"name": "session", "value": "abc"}]
+
+    @property
+    def page_source(self):
+        return f"<html>{self.current_url}</html>"
+
+    def find_elements(self, by, value):
+        return []
+
+    def execute_script(self, script, *args):
+        self.scripts.append((script,) + args)
+
+
+class ScriptedNextLink:
+    """
+    Next page link with href="#", clicking it replaces the page content without changing the URL.
+    """
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.stale = False
+
+    def get_attribute(self, name):
+        return {"href": self.driver.current_url.split("#")[0] + "#"}.get(name)
+
+    def is_displayed(self):
+        return True
+
+    def is_enabled(self):
+        if self.stale:
+            raise StaleElementReferenceException()
+        return True
+
+    def click(self):
+        self.stale = True
+        self.driver.page += 1
+
+
+class ScriptedPagesDriver(StubDriver):
+    def __init__(self, current_url, page_count):
+        super().__init__(current_url)
+        self.page = 1
+        self.page_count = page_count
+
+    @property
+    def page_source(self):
+        return f"<html>{self.page}</html>"
+
+    def find_elements(self, by, value):
+        return [ScriptedNextLink(self)] if self.page < self.page_count else []
+
+
+class TestFollowPagination(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), PagedListingHandler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.url_pattern = f"http://127.0.0.1:{cls.server.server_port}/list?page={{page}}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.driver = StubDriver(self.url_pattern.format(page=1))
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def _execute(self, action):
+        res = action.execute(self.driver, download_folder=self.temp_dir.name)
+        with open(os.path.join(self.temp_dir.name, "result.csv"), "rb") as result_file:
+            return res, result_file.read()
+
+    def test_pages_appended_until_repeated_content(self):
+        action = FollowPagination(next_url_pattern=self.url_pattern, result_file_name="result.csv", skip_header_lines=1)
+        res, content = self._execute(action)
+
+        self.assertIsNone(res)
+        self.assertEqual(content, b"id\n1\n2\n3\n")
+        # pages downloaded over HTTP only without nested actions
+        self.assertEqual(len(self.driver.visited), 1)
+
+    def test_nested_actions_executed_on_each_page(self):
+        nested_action = {
+            "action_name": "GenericDriverAction",
+            "action_parameters": {"method_name": "execute_script", "positional_arguments": ["window.scrollTo(0,1)"]},
+        }
+        action = FollowPagination(
+            actions=[nested_action], next_url_pattern=self.url_pattern, max_pages=2, result_file_name="result.csv"
+        )
+        _, content = self._execute(action)
+
+        self.assertEqual(content, b"id\n1\n2\nid\n3\n")
+        self.assertEqual(self.driver.scripts, [("window.scrollTo(0,1)",), ("window.scrollTo(0,1)",)])
+        self.assertEqual(self.driver.visited, [self.url_pattern.format(page=1), self.url_pattern.format(page=2)])
+
+    def test_page_source_stored_from_each_page(self):
+        action = FollowPagination(
+            next_url_pattern=self.url_pattern, max_pages=2, result_file_name="result.csv", use_stream_get=False
+        )
+        _, content = self._execute(action)
+
+        self.assertEqual(self.driver.visited, [self.url_pattern.format(page=1), self.url_pattern.format(page=2)])
+        expected = "".join(f"<html>{url}</html>" for url in self.driver.visited)
+        self.assertEqual(content, expected.encode())
+
+    def test_exit_action_stops_pagination(self):
+        exit_action = {"action_name": "ExitAction", "action_parameters": {"status": 0, "message": "done"}}
+        action = FollowPagination(actions=[exit_action], next_url_pattern=self.url_pattern, result_file_name="result.csv")
+        res, content = self._execute(action)
+
+        self.assertIsInstance(res, ExitAction)
+        self.assertEqual(content, b"id\n1\n2\n")
+
+    def test_fragment_only_link_stored_from_page_source(self):
+        self.driver = ScriptedPagesDriver(self.url_pattern.format(page=1), page_count=4)
+        action = FollowPagination(next_xpath="//a", result_file_name="result.csv", use_stream_get=False)
+        _, content = self._execute(action)
+
+        self.assertEqual(content, b"<html>1</html><html>2</html><html>3</html><html>4</html>")
+        self.assertEqual(self.driver.visited, [self.url_pattern.format(page=1)])
+
+    def test_fragment_only_link_not_downloaded(self):
+        self.driver = ScriptedPagesDriver(self.url_pattern.format(page=1), page_count=4)
+        action = FollowPagination(next_xpath="//a", result_file_name="result.csv")
+
+        with self.assertRaises(UserException):
+            self._execute(action)
+
+    def test_nested_actions_with_empty_parameters_array(self):
+        # KBC stores an empty object as an empty array
+        action = FollowPagination(
+            actions=[{"action_name": "BreakBlockExecution", "action_parameters": []}],
+            next_url_pattern=self.url_pattern,
+            result_file_name="result.csv",
+        )
+        res, content = self._execute(action)
+
+        self.assertIsNone(res)
+        self.assertEqual(content, b"id\n1\n2\n")
+
+    def test_next_page_definition_required(self):
+        with self.assertRaises(ValueError):
+            FollowPagination(next_xpath="//a", next_url_pattern=self.url_pattern)
+
+
+class TestCrawlerActionBuilder(unittest.TestCase):
+    def test_conditional_action_with_empty_parameters_array(self):
+        action = CrawlerActionBuilder.build_from_definition(
+            {
+                "action_name": "ConditionalAction",
+                "action_parameters": {
+                    "test_action": {"action_name": "BreakBlockExecution", "action_parameters": []},
+                    "result_action": {"action_name": "ExitAction", "action_parameters": {"status": 0, "message": "done"}},
+                },
+            }
+        )
+
+        self.assertIsInstance(action, ConditionalAction)
+        self.assertIsInstance(action.test_action, BreakBlockExecution)
+        self.assertIsInstance(action.result_action, ExitAction)
+
+
+@mock.patch("webcrawler.selenium_crawler.WebDriverWait")
+class TestWaitForElement(unittest.TestCase):
+    def setUp(self):
+        history = LatencyHistory({"WaitForElement //form": [1.0] * 5})
+        self.adaptive_timeouts = AdaptiveTimeouts(history, margin=2, min_timeout=5)
+
+    def test_configured_delay_outside_condition(self, wait_cls):
+        WaitForElement("//form", delay=30).execute(mock.Mock(), adaptive_timeouts=self.adaptive_timeouts)
+
+        self.assertEqual(wait_cls.call_args[0][1], 30)
+        self.assertEqual(self.adaptive_timeouts.history.sample_count("WaitForElement //form"), 6)
+
+    def test_condition_fails_on_adapted_timeout_with_warning(self, wait_cls):
+        wait_cls.return_value.until.side_effect = TimeoutException()
+
+        with self.assertLogs(level="WARNING"), self.assertRaises(TimeoutException):
+            WaitForElement("//form", delay=30).execute(
+                mock.Mock(), adaptive_timeouts=self.adaptive_timeouts, fail_fast=True
+            )
+        self.assertEqual(wait_cls.call_args[0][1], 5)
+
+
+if __name__ == "__main__":
+    unittest.main()
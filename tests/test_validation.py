@@ -0,0 +1,114 @@
+import unittest
+
+from webcrawler.validation import ConfigValidator, XPathSyntaxChecker
+
+
+class TestXPathSyntaxChecker(unittest.TestCase):
+    def test_valid_expressions(self):
+        for expression in [
+            '//*[@id="login"]/div[2]',
+            "//a[contains(text(), 'Next') and not(@disabled)]",
+            "(//tr)[last()]/td[position() mod 2 = 0]",
+            "//div[@class='x']/following-sibling::span | //span/@title",
+            "/html/body/*[1]",
+        ]:
+            XPathSyntaxChecker.check(expression)
+
+    def test_invalid_expressions(self):
+        for expression in ["//div[@id='x'", "//a[contains(text(), 'x']", "//div/", "//foo(", "//a[uknown()]", "//x::a"]:
+            with self.assertRaises(ValueError, msg=expression):
+                XPathSyntaxChecker.check(expression)
+
+
+class TestConfigValidator(unittest.TestCase):
+    def setUp(self):
+        self.validator = ConfigValidator(supported_functions=["concat"], tab_actions=["WaitForElement"])
+
+    def _parameters(self, actions, **kwargs):
+        parameters = {"start_url": "https://example.com", "steps": [{"description": "step", "actions": actions}]}
+        parameters.update(kwargs)
+        return parameters
+
+    def test_valid_configuration(self):
+        actions = [
+            {"action_name": "WaitForElement", "action_parameters": {"xpath": "//input", "delay": 10}},
+            {"action_name": "GenericElementAction", "action_parameters": {"xpath": "//input", "method_name": "click"}},
+            {"action_name": "GenericElementAction",
+             "action_parameters": {"xpath": "//input", "method_name": "send_keys", "keys": {"attr": "user"}}},
+        ]
+        errors = self.validator.validate_parameters(self._parameters(actions, user_parameters={"user": "name"}))
+        self.assertEqual(errors, [])
+
+    def test_all_errors_reported(self):
+        actions = [
+            {"action_name": "WaitForElement", "action_parameters": {"xpath": "//input[", "delay": "10"}},
+            {"action_name": "GenericElementAction", "action_parameters": {"xpath": "//a", "method_name": "clik"}},
+            {"action_name": "ClickElementToDownload", "action_parameters": {"xpat": "//a"}},
+            {"action_name": "Unknown"},
+            {"action_name": "ConditionalAction",
+             "action_parameters": {"test_action": {"action_name": "WaitForElement", "action_parameters": {}}}},
+        ]
+        errors = self.validator.validate_parameters(
+            self._parameters(actions, resolution="big", user_parameters={"x": {"function": "nope"}})
+        )
+        self.assertEqual(len(errors), 9, errors)
+        self.assertIn("Invalid resolution", errors[0])
+        self.assertIn("[nope]", errors[1])
+        self.assertIn("parameter 'xpath'", errors[3])
+        self.assertIn("'clik' is not a method of WebElement", errors[4])
+        self.assertIn("missing required parameter 'xpath'", errors[8])
+
+    def test_undefined_user_parameter(self):
+        actions = [{"action_name": "WaitForElement", "action_parameters": {"xpath": {"attr": "missing"}}}]
+        errors = self.validator.validate_parameters(self._parameters(actions))
+        self.assertEqual(errors, ["User parameter 'missing' referenced in steps is not present in 'user_parameters'."])
+
+    def test_pagination_nested_actions(self):
+        actions = [
+            {"action_name": "FollowPagination",
+             "action_parameters": {"actions": [{"action_name": "WaitForElement", "action_parameters": {}}]}},
+        ]
+        errors = self.validator.validate_parameters(self._parameters(actions))
+        self.assertEqual(len(errors), 2, errors)
+        self.assertIn("exactly one of the parameters 'next_xpath' or 'next_url_pattern'", errors[0])
+        self.assertIn("actions[0] (WaitForElement): missing required parameter 'xpath'", errors[1])
+
+    def test_unsupported_tab_action(self):
+        parameters = self._parameters([{"action_name": "TakeScreenshot", "action_parameters": {"name": "x"}}])
+        parameters["steps"][0]["run_in_tab"] = True
+        errors = self.validator.validate_parameters(parameters)
+        self.assertEqual(len(errors), 1)
+        self.assertIn("not supported in steps running in tabs", errors[0])
+
+    def test_unsupported_tab_method(self):
+        validator = ConfigValidator(
+            tab_actions=["GenericElementAction"], tab_methods={"GenericElementAction": ["click", "get_attribute"]}
+        )
+        actions = [
+            {"action_name": "GenericElementAction", "action_parameters": {"xpath": "//a", "method_name": "click"}},
+            {"action_name": "GenericElementAction",
+             "action_parameters": {"xpath": "//a", "method_name": "get_property", "positional_arguments": ["x"]}},
+        ]
+        parameters = self._parameters(actions)
+        self.assertEqual(validator.validate_parameters(parameters), [])
+
+        parameters["steps"][0]["run_in_tab"] = True
+        errors = validator.validate_parameters(parameters)
+        self.assertEqual(len(errors), 1, errors)
+        self.assertIn("action 1:", errors[0])
+        self.assertIn("method 'get_property' of GenericElementAction is not supported in steps running in tabs", errors[0])
+
+    def test_download_rejected_with_remote_driver(self):
+        download = {"action_name": "ClickElementToDownload", "action_parameters": {"xpath": "//a"}}
+        actions = [{"action_name": "ConditionalAction", "action_parameters": {"test_action": download}}]
+        parameters = self._parameters(actions)
+        self.assertEqual(self.validator.validate_parameters(parameters), [])
+
+        parameters["driver_backend"] = {"type": "remote", "remote_url": "http://selenium:4444"}
+        errors = self.validator.validate_parameters(parameters)
+        self.assertEqual(len(errors), 1, errors)
+        self.assertIn("ClickElementToDownload is not supported with the 'remote' driver backend", errors[0])
+
+
+if __name__ == "__main__":
+    unittest.main()